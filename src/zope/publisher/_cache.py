@@ -0,0 +1,138 @@
+##############################################################################
+#
+# Copyright (c) 2022 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Small caching helpers shared by the publisher modules.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+
+# All caches, so that tests can empty them.
+_caches = weakref.WeakValueDictionary()
+
+
+class LRUCache(object):
+    """A bounded, thread-safe mapping that evicts least recently used keys.
+
+    Values are shared between threads, so callers should only store
+    immutable values (strings, tuples, ...).
+
+      >>> cache = LRUCache(2)
+      >>> cache.set('a', 1)
+      >>> cache.set('b', 2)
+      >>> cache.get('a')
+      1
+      >>> cache.set('c', 3)
+      >>> cache.get('b') is None
+      True
+      >>> len(cache)
+      2
+
+    A size of zero disables caching:
+
+      >>> cache = LRUCache(0)
+      >>> cache.set('a', 1)
+      >>> cache.get('a', 'missing')
+      'missing'
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[id(self)] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            data = self._data
+            try:
+                value = data.pop(key)
+            except KeyError:
+                return default
+            data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            data = self._data
+            data.pop(key, None)
+            data[key] = value
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Cache(dict):
+    """A plain dict that is emptied when it grows too large.
+
+    For read-mostly tables on hot paths: reading is a plain (lock-free)
+    dict lookup, which is much cheaper than an `LRUCache` hit.
+
+      >>> cache = Cache(2)
+      >>> cache.set('a', 1)
+      >>> cache.set('b', 2)
+      >>> cache.get('a')
+      1
+      >>> cache.set('c', 3)
+      >>> sorted(cache)
+      ['c']
+    """
+
+    def __init__(self, maxsize=1000):
+        super(Cache, self).__init__()
+        self.maxsize = maxsize
+        _caches[id(self)] = self
+
+    def set(self, key, value):
+        if len(self) >= self.maxsize:
+            self.clear()
+        self[key] = value
+
+
+def clearCaches():
+    """Empty all caches.
+
+    This is registered as a test cleanup, so that no module needs to
+    register its caches itself::
+
+      >>> cache = LRUCache()
+      >>> cache.set('a', 1)
+      >>> clearCaches()
+      >>> len(cache)
+      0
+    """
+    for cache in list(_caches.values()):
+        cache.clear()
+
+
+# Process-wide caches must not leak between tests.
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(clearCaches)
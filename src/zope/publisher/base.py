@@ -25,6 +25,7 @@ from zope.interface.common.mapping import IEnumerableMapping
 from zope.interface.common.mapping import IReadMapping
 from zope.security.proxy import removeSecurityProxy
 
+from zope.publisher._cache import LRUCache
 from zope.publisher._compat import PYTHON2
 from zope.publisher.interfaces import DebugError
 from zope.publisher.interfaces import IDebugFlags
@@ -37,6 +38,13 @@ from zope.publisher.interfaces import Unauthorized
 from zope.publisher.publish import mapply
 
 
+try:
+    from time import perf_counter as _timer
+except ImportError:  # pragma: no cover
+    # Python 2
+    from time import time as _timer
+
+
 _marker = object()
 
 
@@ -177,6 +185,7 @@ class BaseRequest(object):
         '_traversed_names',  # The names that have been traversed
         '_last_obj_traversed',  # Object that was traversed last
         '_traversal_stack',  # Names to be traversed, in reverse order
+        '_default_traversal',  # True while traversing default steps
         '_environ',          # The request environment variables
         '_response',         # The response
         '_args',             # positional arguments
@@ -194,6 +203,7 @@ class BaseRequest(object):
     def __init__(self, body_instream, environ, response=None,
                  positional=None):
         self._traversal_stack = []
+        self._default_traversal = False
         self._last_obj_traversed = None
         self._traversed_names = []
         self._environ = environ
@@ -247,17 +257,28 @@ class BaseRequest(object):
 
         traversal_stack = self._traversal_stack
         traversed_names = self._traversed_names
+        # Publications may opt in to caching and tracing of traversal.
+        cache = getattr(publication, 'traversalCache', None)
+        tracer = getattr(publication, 'traversalTracer', None)
 
         prev_object = None
+        step = None
         while True:
 
             self._last_obj_traversed = obj
 
+            if tracer is not None:
+                start = _timer()
+
             if (removeSecurityProxy(obj)
                     is not removeSecurityProxy(prev_object)):
                 # Invoke hooks (but not more than once).
                 publication.callTraversalHooks(self, obj)
 
+            if step is not None:
+                tracer.record(self, prev_object, step[0], step[1],
+                              _timer() - start, self._default_traversal)
+
             if not traversal_stack:
                 # Finished traversal.
                 break
@@ -267,7 +288,14 @@ class BaseRequest(object):
             # Traverse to the next step.
             entry_name = traversal_stack.pop()
             traversed_names.append(entry_name)
-            obj = publication.traverseName(self, obj, entry_name)
+            if tracer is not None:
+                start = _timer()
+            if cache is None:
+                obj = publication.traverseName(self, obj, entry_name)
+            else:
+                obj = cache.traverseName(publication, self, obj, entry_name)
+            if tracer is not None:
+                step = (entry_name, _timer() - start)
 
         return obj
 
@@ -308,32 +336,41 @@ class BaseRequest(object):
 
     bodyStream = property(_getBodyStream)
 
+    def _getMappings(self):
+        """Return the mappings holding request data, by precedence."""
+        return (self._environ,)
+
+    def _keys(self):
+        """Return the keys of all request data.
+
+        The mappings are merged with C-level set operations rather than by
+        copying their items into a new dict.
+        """
+        mappings = self._getMappings()
+        if len(mappings) == 1:
+            return mappings[0]
+        return set(mappings[0]).union(*mappings[1:])
+
     def __len__(self):
         """See Interface.Common.Mapping.IEnumerableMapping."""
-        return len(self.keys())
+        return len(self._keys())
 
     def items(self):
         """See Interface.Common.Mapping.IEnumerableMapping."""
-        result = []
         get = self.get
-        for k in self.keys():
-            result.append((k, get(k)))
-        return result
+        return [(key, get(key)) for key in self._keys()]
 
     def keys(self):
         """See Interface.Common.Mapping.IEnumerableMapping."""
-        return self._environ.keys()
+        return list(self._keys())
 
     def __iter__(self):
-        return iter(self.keys())
+        return iter(self._keys())
 
     def values(self):
         """See Interface.Common.Mapping.IEnumerableMapping."""
-        result = []
         get = self.get
-        for k in self.keys():
-            result.append(get(k))
-        return result
+        return [get(key) for key in self._keys()]
 
     def __getitem__(self, key):
         """See Interface.Common.Mapping.IReadMapping."""
@@ -345,9 +382,10 @@ class BaseRequest(object):
 
     def get(self, key, default=None):
         """See Interface.Common.Mapping.IReadMapping."""
-        result = self._environ.get(key, _marker)
-        if result is not _marker:
-            return result
+        for mapping in self._getMappings():
+            result = mapping.get(key, _marker)
+            if result is not _marker:
+                return result
 
         return default
 
@@ -375,34 +413,52 @@ class BaseRequest(object):
 
     def _setupPath_helper(self, attr):
         path = self.get(attr, "/")
-        if path.endswith('/'):
-            # Remove trailing backslash, so that we will not get an empty
-            # last entry when splitting the path.
-            path = path[:-1]
-            self._endswithslash = True
-        else:
-            self._endswithslash = False
-
-        clean = []
-        for item in path.split('/'):
-            if not item or item == '.':
-                continue
-            elif item == '..':
-                # try to remove the last name
-                try:
-                    del clean[-1]
-                except IndexError:
-                    # the list of names was empty, so do nothing and let the
-                    # string '..' be placed on the list
-                    pass
-            clean.append(item)
-
-        clean.reverse()
-        self.setTraversalStack(clean)
+        parsed = _path_cache.get(path)
+        if parsed is None:
+            parsed = _parsePath(path)
+            _path_cache.set(path, parsed)
+        stack, self._endswithslash = parsed
+        self.setTraversalStack(stack)
 
         self._path_suffix = None
 
 
+# Parsed paths, shared by all requests.  Deep paths are common, and the
+# same paths are requested over and over again.
+_path_cache = LRUCache(1000)
+
+
+def _parsePath(path):
+    """Parse a path into a reversed traversal stack.
+
+    Returns the stack as a tuple and whether the path ends with a slash.
+    """
+    if path.endswith('/'):
+        # Remove trailing backslash, so that we will not get an empty
+        # last entry when splitting the path.
+        path = path[:-1]
+        endswithslash = True
+    else:
+        endswithslash = False
+
+    clean = []
+    for item in path.split('/'):
+        if not item or item == '.':
+            continue
+        elif item == '..':
+            # try to remove the last name
+            try:
+                del clean[-1]
+            except IndexError:
+                # the list of names was empty, so do nothing and let the
+                # string '..' be placed on the list
+                pass
+        clean.append(item)
+
+    clean.reverse()
+    return tuple(clean), endswithslash
+
+
 class TestRequest(BaseRequest):
 
     __slots__ = ('_presentation_type', )
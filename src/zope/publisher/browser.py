@@ -18,6 +18,7 @@ big improvement of the 'BrowserRequest' to 'HTTPRequest' is that is can handle
 HTML form data and convert them into a Python-native format. Even file data is
 packaged into a nice, Python-friendly 'FileUpload' object.
 """
+import codecs
 import re
 from email.message import Message
 
@@ -34,10 +35,12 @@ from zope.interface import directlyProvides
 from zope.interface import implementer
 from zope.location import Location
 
+from zope.publisher._cache import LRUCache
 from zope.publisher._compat import PYTHON2
 from zope.publisher.http import HTTPRequest
 from zope.publisher.http import HTTPResponse
 from zope.publisher.http import getCharsetUsingRequest
+from zope.publisher.http import getPreferredCharsetsUsingRequest
 # BBB imports, these components got moved from this module
 from zope.publisher.interfaces import IHeld
 from zope.publisher.interfaces import ISkinChangedEvent  # noqa: F401
@@ -59,6 +62,9 @@ __ArrayTypes = (list, tuple)
 
 start_of_header_search = re.compile(b'(<head[^>]*>)', re.I).search
 base_re_search = re.compile(b'(<base.*?>)', re.I).search
+# How far into a body (and past the <head> tag) BrowserResponse looks for
+# the <head> and <base> tags.
+_HEAD_SEARCH_SIZE = 65536
 isRelative = re.compile("[-_.!~*a-zA-z0-9'()@&=+$,]+(/|$)").match
 newlines = re.compile('\r\n|\n\r|\r')
 
@@ -238,6 +244,27 @@ class Record(object):
 
 _get_or_head = 'GET', 'HEAD'
 
+# Default traversal steps of publications that declare them cacheable,
+# keyed on (publication, object specification, request specification).
+_default_traversal_cache = LRUCache(1000)
+
+
+def _getDefaultTraversal(publication, request, ob):
+    if not getattr(publication, 'cacheableDefaultTraversal', False):
+        return publication.getDefaultTraversal(request, ob)
+
+    key = (publication, zope.interface.providedBy(ob),
+           zope.interface.providedBy(request))
+    steps = _default_traversal_cache.get(key)
+    if steps is not None:
+        return ob, steps
+
+    result, steps = publication.getDefaultTraversal(request, ob)
+    if result is ob and steps is not None:
+        # Only steps that keep the object can be reused for other objects.
+        _default_traversal_cache.set(key, tuple(steps))
+    return result, steps
+
 
 @implementer(IBrowserRequest, IBrowserApplicationRequest)
 class BrowserRequest(HTTPRequest):
@@ -269,9 +296,11 @@ class BrowserRequest(HTTPRequest):
     def _decode(self, text):
         """Try to decode the text using one of the available charsets."""
         if self.charsets is None:
-            envadapter = IUserPreferredCharsets(self)
-            self.charsets = envadapter.getPreferredCharsets() or ['utf-8']
-            self.charsets = [c for c in self.charsets if c != '*']
+            charsets = getPreferredCharsetsUsingRequest(self)
+            if charsets is None:
+                raise TypeError(
+                    'Could not adapt', self, IUserPreferredCharsets)
+            self.charsets = [c for c in charsets or ['utf-8'] if c != '*']
         # All text comes from parse_qsl or multipart.parse_form_data, and
         # has normally already been decoded into Unicode according to a
         # request-specified encoding.  However, in the case of query strings
@@ -610,14 +639,18 @@ class BrowserRequest(HTTPRequest):
             publication = self.publication
 
             nsteps = 0
-            ob, add_steps = publication.getDefaultTraversal(self, ob)
+            ob, add_steps = _getDefaultTraversal(publication, self, ob)
             while add_steps:
                 nsteps += len(add_steps)
                 add_steps = list(add_steps)
                 add_steps.reverse()
                 self.setTraversalStack(add_steps)
-                ob = super(BrowserRequest, self).traverse(ob)
-                ob, add_steps = publication.getDefaultTraversal(self, ob)
+                self._default_traversal = True
+                try:
+                    ob = super(BrowserRequest, self).traverse(ob)
+                finally:
+                    self._default_traversal = False
+                ob, add_steps = _getDefaultTraversal(publication, self, ob)
 
             if nsteps != self._endswithslash:
                 base_needed = 1
@@ -634,22 +667,9 @@ class BrowserRequest(HTTPRequest):
 
         return ob
 
-    def keys(self):
-        'See Interface.Common.Mapping.IEnumerableMapping'
-        d = {}
-        d.update(self._environ)
-        d.update(self._cookies)
-        d.update(self.form)
-        return list(d.keys())
-
-    def get(self, key, default=None):
-        'See Interface.Common.Mapping.IReadMapping'
-        marker = object()
-        result = self.form.get(key, marker)
-        if result is not marker:
-            return result
-
-        return super(BrowserRequest, self).get(key, default)
+    def _getMappings(self):
+        'See BaseRequest'
+        return (self.form, self._cookies, self._environ)
 
 
 @implementer(IHeld)
@@ -762,41 +782,47 @@ class BrowserResponse(HTTPResponse):
             self.setHeader('content-type', content_type)
 
         body, headers = super(BrowserResponse, self)._implicitResult(body)
-        body = self.__insertBase(body)
+        chunks = self.__insertBase(body)
+        if chunks is None:
+            return body, headers
         # Update the Content-Length header to account for the inserted
         # <base> tag.
         headers = [
             (name, value) for name, value in headers
             if name != 'content-length'
         ]
-        headers.append(('content-length', str(len(body))))
-        return body, headers
+        headers.append(('content-length',
+                        str(len(body) + len(chunks[1]))))
+        return chunks, headers
 
     def __insertBase(self, body):
+        """Insert a <base> tag after the <head> tag of an HTML body.
+
+        Return the body as (start, base tag, rest) chunks, so that it need
+        not be copied into a new string, or None if nothing was inserted.
+        Only the start of the body is searched for the tags.
+        """
         # Only insert a base tag if content appears to be html.
         content_type = self.getHeader('content-type', '')
         if content_type and not is_text_html(content_type):
-            return body
-
-        if self.getBase():
-            if body:
-                match = start_of_header_search(body)
-                if match is not None:
-                    index = match.start(0) + len(match.group(0))
-                    ibase = base_re_search(body)
-                    if ibase is None:
-                        # Make sure the base URL is not a unicode string.
-                        base = self.getBase()
-                        if not isinstance(base, bytes):
-                            encoding = getCharsetUsingRequest(
-                                self._request) or 'utf-8'
-                            base = self.getBase().encode(encoding)
-                        body = b''.join([body[:index],
-                                         b'\n<base href="',
-                                         base,
-                                         b'" />\n',
-                                         body[index:]])
-        return body
+            return None
+
+        if self.getBase() and body:
+            match = start_of_header_search(body, 0, _HEAD_SEARCH_SIZE)
+            if match is not None:
+                index = match.end(0)
+                ibase = base_re_search(body, 0, index + _HEAD_SEARCH_SIZE)
+                if ibase is None:
+                    # Make sure the base URL is not a unicode string.
+                    base = self.getBase()
+                    if not isinstance(base, bytes):
+                        encoding = getCharsetUsingRequest(
+                            self._request) or 'utf-8'
+                        base = self.getBase().encode(encoding)
+                    return (body[:index],
+                            b'\n<base href="' + base + b'" />\n',
+                            body[index:])
+        return None
 
     def getBase(self):
         return getattr(self, '_base', '')
@@ -830,14 +856,36 @@ class BrowserResponse(HTTPResponse):
         self._base = ''
 
 
+# isHTML only looks at the start of a body, so guessing the content type
+# costs the same for bodies of any size.
+_SNIFF_SIZE = 4096
+
+
 def isHTML(str):
-    """Try to determine whether str is HTML or not."""
-    if isinstance(str, six.binary_type):
+    """Try to determine whether str is HTML or not.
+
+    Only the first few kilobytes are examined, and a leading comment must
+    end within them::
+
+      >>> isHTML(b'<html><body>' + b'x' * 100000)
+      True
+      >>> isHTML(u'  <!DOCTYPE html>')
+      True
+      >>> isHTML(b'<!-- ' + b'x' * 100000 + b' --><html>')
+      False
+      >>> isHTML(b'<html>\\xc3\\x9b' + b'x' * 100000)
+      True
+      >>> isHTML(b'<html>\\xff')
+      False
+    """
+    s = str[:_SNIFF_SIZE]
+    if isinstance(s, six.binary_type):
         try:
-            str = str.decode()
+            # An incremental decoder accepts a character cut off at the end.
+            s = codecs.getincrementaldecoder('utf-8')().decode(s)
         except UnicodeDecodeError:
             return False
-    s = str.lstrip().lower()
+    s = s.lstrip().lower()
     if s.startswith('<!doctype html'):
         return True
     if s.startswith('<html') and (s[5:6] in ' >'):
@@ -856,6 +904,10 @@ def normalize_lang(lang):
     return lang
 
 
+# Parsed Accept-Language headers, shared by all requests.
+_languages_cache = LRUCache(1000)
+
+
 @zope.component.adapter(IHTTPRequest)
 @implementer(IUserPreferredLanguages)
 class BrowserLanguages(object):
@@ -865,7 +917,15 @@ class BrowserLanguages(object):
 
     def getPreferredLanguages(self):
         '''See interface IUserPreferredLanguages'''
-        accept_langs = self.request.get('HTTP_ACCEPT_LANGUAGE', '').split(',')
+        header = self.request.get('HTTP_ACCEPT_LANGUAGE', '')
+        languages = _languages_cache.get(header)
+        if languages is None:
+            languages = self._parseAcceptLanguage(header)
+            _languages_cache.set(header, languages)
+        return languages
+
+    def _parseAcceptLanguage(self, header):
+        accept_langs = header.split(',')
 
         # Normalize lang strings
         accept_langs = [normalize_lang(lang) for lang in accept_langs]
@@ -906,7 +966,7 @@ class BrowserLanguages(object):
         accepts.sort()
         accepts.reverse()
 
-        return [lang for quality, lang in accepts]
+        return tuple(lang for quality, lang in accepts)
 
 
 class NotCompatibleAdapterError(Exception):
@@ -18,6 +18,7 @@ from zope.component import getSiteManager
 from zope.interface.interfaces import ComponentLookupError
 
 from zope.publisher.interfaces import IDefaultViewName
+from zope.publisher.publish import countLookup
 
 
 class IDefaultViewNameAPI(zope.interface.Interface):
@@ -84,9 +85,29 @@ def queryDefaultViewName(object, request, default=None, context=None):
       ...     provides=zope.publisher.interfaces.IDefaultViewName)
       >>> queryDefaultViewName(MyObject(), object())
       ''
+
+    Registrations made later are taken into account:
+
+      >>> class IMyRequest(zope.interface.Interface):
+      ...   pass
+      >>> @zope.interface.implementer(IMyRequest)
+      ... class MyRequest(object):
+      ...   pass
+      >>> queryDefaultViewName(MyObject(), MyRequest())
+      ''
+      >>> zope.component.provideAdapter('special',
+      ...     adapts=(IMyObject, IMyRequest),
+      ...     provides=zope.publisher.interfaces.IDefaultViewName)
+      >>> queryDefaultViewName(MyObject(), MyRequest())
+      'special'
     """
+    # The adapter registry caches lookups by the required specifications
+    # and invalidates them when registrations change, so there is no need
+    # for a cache of our own.
+    countLookup(request)
+    providedBy = zope.interface.providedBy
     name = getSiteManager(context).adapters.lookup(
-        map(zope.interface.providedBy, (object, request)), IDefaultViewName)
+        (providedBy(object), providedBy(request)), IDefaultViewName)
     if name is None:
         return default
     return name
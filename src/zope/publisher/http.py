@@ -14,9 +14,13 @@
 """HTTP Publisher
 """
 import base64
+import codecs
+import hashlib
 import logging
 import re
 import tempfile
+import uuid
+import zlib
 from io import BytesIO
 
 import zope.component
@@ -28,6 +32,8 @@ from zope.i18n.interfaces import IUserPreferredLanguages
 from zope.i18n.locales import LoadLocaleError
 from zope.i18n.locales import locales
 
+from zope.publisher._cache import Cache
+from zope.publisher._cache import LRUCache
 from zope.publisher._compat import CLASS_TYPES
 from zope.publisher._compat import PYTHON2
 from zope.publisher._compat import to_unicode
@@ -46,18 +52,28 @@ from zope.publisher.interfaces.http import IHTTPResponse
 from zope.publisher.interfaces.http import IHTTPVirtualHostChangedEvent
 from zope.publisher.interfaces.http import IResult
 from zope.publisher.interfaces.logginginfo import ILoggingInfo
+from zope.publisher.publish import _etagMatches
+from zope.publisher.publish import countLookup
 from zope.publisher.skinnable import setDefaultSkin
 
 
 if PYTHON2:
     from cgi import escape
+    from collections import MutableMapping
     from urllib import quote
 
     import Cookie as cookies
+    from __builtin__ import intern as _intern
     from urlparse import urlsplit
+
+    def intern(s):
+        # Python 2 can only intern byte strings, keep unicode as it is.
+        return _intern(s) if isinstance(s, str) else s
 else:
     import http.cookies as cookies
+    from collections.abc import MutableMapping
     from html import escape
+    from sys import intern
     from urllib.parse import quote
     from urllib.parse import urlsplit
     unicode = str
@@ -132,6 +148,116 @@ def sane_environment(env):
     return dict
 
 
+_marker = object()
+_unchanged = object()
+_deleted = object()
+
+
+class SaneEnvironment(MutableMapping):
+    """A copy-on-write view of a WSGI environment.
+
+    This provides the same data as ``sane_environment``, but only records
+    the keys that differ from the original environment.  Everything else
+    is read through to the original, which is never modified:
+
+      >>> env = {'REDIRECT_SCRIPT_NAME': '/app', 'PATH_INFO': '/folder',
+      ...        'SERVER_NAME': 'example.com'}
+      >>> sane = SaneEnvironment(env)
+      >>> sorted(sane.items()) == sorted(sane_environment(env).items())
+      True
+      >>> del sane['SERVER_NAME']
+      >>> sane['QUERY_STRING'] = ''
+      >>> sorted(sane)
+      ['PATH_INFO', 'QUERY_STRING', 'SCRIPT_NAME']
+      >>> sorted(env)
+      ['PATH_INFO', 'REDIRECT_SCRIPT_NAME', 'SERVER_NAME']
+    """
+
+    __slots__ = (
+        '_base',     # The original environment
+        '_changes',  # Changed keys, mapping to _deleted when removed
+    )
+
+    def __init__(self, env):
+        self._base = env
+        self._changes = changes = {}
+        for key, val in env.items():
+            if key.startswith('REDIRECT_'):
+                changes[key] = _deleted
+                while key.startswith('REDIRECT_'):
+                    key = key[9:]
+                changes[key] = val
+            elif key in changes:
+                # Like sane_environment, let the last one win.
+                changes[key] = val
+        if 'HTTP_CGI_AUTHORIZATION' in self:
+            self['HTTP_AUTHORIZATION'] = self.pop('HTTP_CGI_AUTHORIZATION')
+        if 'PATH_INFO' in self:
+            # Recode PATH_INFO to UTF-8 from original latin1
+            pi = orig = self['PATH_INFO']
+            pi = pi if isinstance(pi, bytes) else pi.encode('latin1')
+            pi = pi.decode(ENCODING)
+            # On Python 2 an ASCII byte string equals its decoded form, but
+            # PATH_INFO must always become unicode.
+            if type(pi) is not type(orig) or pi != orig:
+                self['PATH_INFO'] = pi
+
+    def __getitem__(self, key):
+        value = self._changes.get(key, _unchanged)
+        if value is _unchanged:
+            return self._base[key]
+        if value is _deleted:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._changes.get(key, _unchanged)
+        if value is _unchanged:
+            return self._base.get(key, default)
+        if value is _deleted:
+            return default
+        return value
+
+    def __contains__(self, key):
+        value = self._changes.get(key, _unchanged)
+        if value is _unchanged:
+            return key in self._base
+        return value is not _deleted
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes[key] = _deleted
+
+    def __iter__(self):
+        changes = self._changes
+        if not changes:
+            return iter(self._base)
+        keys = [key for key in self._base if key not in changes]
+        keys.extend(
+            key for key, value in changes.items() if value is not _deleted)
+        return iter(keys)
+
+    def __len__(self):
+        base = self._base
+        size = len(base)
+        for key, value in self._changes.items():
+            if key in base:
+                size -= 1
+            if value is not _deleted:
+                size += 1
+        return size
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
 @zope.interface.implementer(IHTTPVirtualHostChangedEvent)
 class HTTPVirtualHostChangedEvent(object):
 
@@ -292,6 +418,63 @@ class HTTPInputStream(object):
 
 DEFAULT_PORTS = {'http': '80', 'https': '443'}
 
+# Interned environment keys and header names, shared by all requests.
+# They are read many times per request, so they are plain dicts.
+_header_keys = Cache(1000)
+_header_names = Cache(1000)
+
+# CGI variables which carry request headers without an HTTP_ prefix.
+_cgi_headers = {
+    'CONTENT_TYPE': 'Content-Type',
+    'CONTENT_LENGTH': 'Content-Length',
+}
+
+
+# Data written to responses is kept in memory up to this size, and spooled
+# to a temporary file beyond.
+STREAM_BUFFER_SIZE = 65536
+
+# Quoted URL path segments, shared by all requests.
+_quoted_names = Cache(10000)
+
+
+def _quoteName(name):
+    """Quote a traversed name for use in a URL."""
+    quoted = _quoted_names.get(name)
+    if quoted is None:
+        quoted = quote(name.encode("utf-8"), safe='/+@')
+        _quoted_names.set(name, quoted)
+    return quoted
+
+
+def _getHeaderKeys(name):
+    """Return the environment keys to look up for a header name."""
+    keys = _header_keys.get(name)
+    if keys is None:
+        key = intern(name.replace('-', '_').upper())
+        if key.startswith('HTTP_'):
+            keys = (key, key)
+        else:
+            keys = (key, intern('HTTP_' + key))
+        _header_keys.set(name, keys)
+    return keys
+
+
+def _getHeaderName(key):
+    """Return the header name for an environment key, or None."""
+    name = _header_names.get(key, _marker)
+    if name is _marker:
+        if key in _cgi_headers:
+            name = _cgi_headers[key]
+        elif key.startswith('HTTP_') and len(key) > 5:
+            name = '-'.join(
+                [part.capitalize() for part in key[5:].split('_')])
+            name = intern(name)
+        else:
+            name = None
+        _header_names.set(key, name)
+    return name
+
 
 @zope.interface.implementer(IHTTPCredentials,
                             IHTTPRequest,
@@ -355,6 +538,8 @@ class HTTPRequest(BaseRequest):
         'method',         # The upper-cased request method (REQUEST_METHOD)
         '_locale',        # The locale for the request
         '_vh_root',       # Object at the root of the virtual host
+        '_preferred_charsets',  # Resolved IUserPreferredCharsets result
+        '_url_cache',     # Computed URLs, see getURL
     )
 
     retry_max_count = 3    # How many times we're willing to retry
@@ -365,7 +550,9 @@ class HTTPRequest(BaseRequest):
             HTTPInputStream(body_instream, environ), environ, response)
 
         self._orig_env = environ
-        environ = sane_environment(environ)
+        self._preferred_charsets = None
+        self._url_cache = {}
+        environ = SaneEnvironment(environ)
 
         if 'HTTP_AUTHORIZATION' in environ:
             self._auth = environ['HTTP_AUTHORIZATION']
@@ -384,6 +571,7 @@ class HTTPRequest(BaseRequest):
         self.setupLocale()
 
     def setupLocale(self):
+        countLookup(self)
         envadapter = IUserPreferredLanguages(self, None)
         if envadapter is None:
             self._locale = None
@@ -532,14 +720,26 @@ class HTTPRequest(BaseRequest):
     def getHeader(self, name, default=None, literal=False):
         """See IHTTPRequest"""
         environ = self._environ
-        if not literal:
-            name = name.replace('-', '_').upper()
-        val = environ.get(name, None)
+        if literal:
+            key = name
+            http_key = name if name.startswith('HTTP_') else 'HTTP_' + name
+        else:
+            key, http_key = _getHeaderKeys(name)
+        val = environ.get(key, None)
         if val is not None:
             return val
-        if not name.startswith('HTTP_'):
-            name = 'HTTP_%s' % name
-        return environ.get(name, default)
+        return environ.get(http_key, default)
+
+    def iterHeaders(self):
+        """Iterate over the request headers as (name, value) pairs.
+
+        Header names are returned in their usual spelling, for example
+        'User-Agent' for the HTTP_USER_AGENT environment variable.
+        """
+        for key, value in self._environ.items():
+            name = _getHeaderName(key)
+            if name is not None:
+                yield name, value
 
     headers = RequestDataProperty(HeaderGetter)
 
@@ -571,6 +771,7 @@ class HTTPRequest(BaseRequest):
     def setPrincipal(self, principal):
         """See IPublicationRequest"""
         super(HTTPRequest, self).setPrincipal(principal)
+        countLookup(self)
         logging_info = ILoggingInfo(principal, None)
         if logging_info is None:
             message = '-'
@@ -583,46 +784,69 @@ class HTTPRequest(BaseRequest):
         return HTTPResponse()
 
     def getURL(self, level=0, path_only=False):
-        names = self._app_names + self._traversed_names
+        app_names = self._app_names
+        traversed_names = self._traversed_names
+        # Traversal only ever appends names, so the number of names
+        # identifies the URL.  Other changes clear the cache explicitly.
+        key = ('url', level, path_only, len(app_names), len(traversed_names))
+        url = self._url_cache.get(key)
+        if url is not None:
+            return url
+
+        names = app_names + traversed_names
         if level:
             if level > len(names):
                 raise IndexError(level)
             names = names[:-level]
         # See: http://www.ietf.org/rfc/rfc2718.txt, Section 2.2.5
-        names = [quote(name.encode("utf-8"), safe='/+@') for name in names]
+        names = [_quoteName(name) for name in names]
 
         if path_only:
             if not names:
-                return '/'
-            return '/' + '/'.join(names)
+                url = '/'
+            else:
+                url = '/' + '/'.join(names)
         else:
             if not names:
-                return self._app_server
-            return "%s/%s" % (self._app_server, '/'.join(names))
+                url = self._app_server
+            else:
+                url = "%s/%s" % (self._app_server, '/'.join(names))
+        self._url_cache[key] = url
+        return url
 
     def getApplicationURL(self, depth=0, path_only=False):
         """See IHTTPApplicationRequest"""
+        app_names = self._app_names
+        key = ('app', depth, path_only, len(app_names),
+               len(self._traversed_names))
+        url = self._url_cache.get(key)
+        if url is not None:
+            return url
+
         if depth:
             names = self._traversed_names
             if depth > len(names):
                 raise IndexError(depth)
-            names = self._app_names + names[:depth]
+            names = app_names + names[:depth]
         else:
-            names = self._app_names
+            names = app_names
 
         # See: http://www.ietf.org/rfc/rfc2718.txt, Section 2.2.5
-        names = [quote(name.encode("utf-8"), safe='/+@') for name in names]
+        names = [_quoteName(name) for name in names]
 
         if path_only:
-            return names and ('/' + '/'.join(names)) or '/'
+            url = names and ('/' + '/'.join(names)) or '/'
         else:
-            return (names and ("%s/%s" % (self._app_server, '/'.join(names)))
-                    or self._app_server)
+            url = (names and ("%s/%s" % (self._app_server, '/'.join(names)))
+                   or self._app_server)
+        self._url_cache[key] = url
+        return url
 
     def setApplicationServer(self, host, proto='http', port=None):
         if port and str(port) != DEFAULT_PORTS.get(proto):
             host = '%s:%s' % (host, port)
         self._app_server = '%s://%s' % (proto, host)
+        self._url_cache.clear()
         zope.event.notify(HTTPVirtualHostChangedEvent(self))
 
     def shiftNameToApplication(self):
@@ -634,6 +858,7 @@ class HTTPRequest(BaseRequest):
         """
         if len(self._traversed_names) == 1:
             self._app_names.append(self._traversed_names.pop())
+            self._url_cache.clear()
             zope.event.notify(HTTPVirtualHostChangedEvent(self))
             return
 
@@ -644,6 +869,7 @@ class HTTPRequest(BaseRequest):
         del self._traversed_names[:]
         self._vh_root = self._last_obj_traversed
         self._app_names = list(names)
+        self._url_cache.clear()
         zope.event.notify(HTTPVirtualHostChangedEvent(self))
 
     def getVirtualHostRoot(self):
@@ -656,21 +882,9 @@ class HTTPRequest(BaseRequest):
         return '<%s.%s instance URL=%s>' % (
             self.__class__.__module__, self.__class__.__name__, str(self.URL))
 
-    def get(self, key, default=None):
-        """See Interface.Common.Mapping.IReadMapping"""
-        marker = object()
-        result = self._cookies.get(key, marker)
-        if result is not marker:
-            return result
-
-        return super(HTTPRequest, self).get(key, default)
-
-    def keys(self):
-        """See Interface.Common.Mapping.IEnumerableMapping"""
-        d = {}
-        d.update(self._environ)
-        d.update(self._cookies)
-        return d.keys()
+    def _getMappings(self):
+        """See BaseRequest"""
+        return (self._cookies, self._environ)
 
 
 @zope.interface.implementer(IHTTPResponse, IHTTPApplicationResponse)
@@ -684,6 +898,24 @@ class HTTPResponse(BaseResponse):
         '_reason',              # The reason that goes with the status
         '_status_set',          # Boolean: status explicitly set
         '_charset',             # String: character set for the output
+        '_stream',              # Buffer of data written with write()
+    )
+
+    # Response compression is opt-in.  When enabled, bodies of the listed
+    # content types (prefixes) with at least compress_min_size bytes are
+    # compressed with gzip or deflate, as negotiated with Accept-Encoding.
+    # Publications enable it with a true ``compressResponses`` attribute,
+    # ``compress`` is the default for publications without one.
+    compress = False
+    compress_min_size = 1024
+    compress_level = 6
+    compress_types = (
+        'text/',
+        'application/javascript',
+        'application/json',
+        'application/xml',
+        'application/xhtml+xml',
+        'image/svg+xml',
     )
 
     def __init__(self):
@@ -693,12 +925,16 @@ class HTTPResponse(BaseResponse):
     def reset(self):
         """See IResponse"""
         super(HTTPResponse, self).reset()
+        if getattr(self, '_stream', None) is not None:
+            self._discardStream()
         self._headers = {}
         self._cookies = {}
         self._status = 599
         self._reason = 'No status set'
         self._status_set = False
         self._charset = None
+        self._result = None
+        self._stream = None
         self.authUser = '-'
 
     def setStatus(self, status, reason=None):
@@ -813,6 +1049,15 @@ class HTTPResponse(BaseResponse):
 
     def setResult(self, result):
         """See IHTTPResponse"""
+        if self._stream is not None:
+            if result is not None and result != b'' and result != u'':
+                raise ValueError(
+                    "Can't set a result after writing to the response.")
+            stream, self._stream = self._stream, None
+            if self.getHeader('content-length') is None:
+                self.setHeader('Content-Length', stream.tell())
+            result = StreamResult(stream)
+
         if IResult.providedBy(result):
             r = result
         else:
@@ -832,36 +1077,211 @@ class HTTPResponse(BaseResponse):
             if isinstance(r, basestring):
                 r, headers = self._implicitResult(r)
                 self._headers.update(dict((k, [v]) for (k, v) in headers))
-                r = (r,)  # chunking should be much larger than per character
+                if not isinstance(r, tuple):
+                    # _implicitResult may already return a few chunks, but
+                    # chunking should be much larger than per character.
+                    r = (r,)
 
-        self._result = r
+        if isinstance(r, TextResult):
+            r = self._textResult(r)
         if not self._status_set:
             self.setStatus(200)
+        if isinstance(r, StreamResult) and self.getHeader(
+                'content-length') is None:
+            size = _streamSize(r)
+            if size is not None:
+                self.setHeader('Content-Length', size)
+        compress = getattr(getattr(self._request, 'publication', None),
+                           'compressResponses', self.compress)
+        encoding = self._contentEncoding() if compress else None
+        if encoding is not None:
+            r = self._compressResult(r, encoding)
+        elif isinstance(r, StreamResult):
+            # Byte ranges are ranges of the uncompressed body, so they are
+            # only served if it is sent as it is.
+            r = self._rangeResult(r)
+        if isinstance(r, tuple):
+            r = self._etagResult(r)
+        self._result = r
+
+    def _rangeResult(self, result):
+        # Serve byte ranges of whole streams, see RFC 7233.
+        request = self._request
+        if (request is None or self._status != 200
+                or result.start or result.end is not None):
+            return result
+        size = _streamSize(result)
+        if size is None:
+            # Not seekable.
+            return result
+        stream = result.stream
+
+        self.setHeader('Accept-Ranges', 'bytes')
+        header = request.getHeader('Range')
+        if not header or getattr(request, 'method', 'GET') != 'GET':
+            return result
+        if_range = request.getHeader('If-Range')
+        if if_range and (if_range.startswith('W/') or if_range not in (
+                self.getHeader('etag'), self.getHeader('last-modified'))):
+            # The client's copy is outdated, send everything.
+            return result
+        ranges = _parseByteRanges(header, size)
+        if ranges is None:
+            return result
+
+        if not ranges:
+            self.setStatus(416)
+            self.setHeader('Content-Range', 'bytes */%d' % size)
+            self.setHeader('Content-Length', 0)
+            result.close()
+            return ()
+
+        self.setStatus(206)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.setHeader('Content-Range',
+                           'bytes %d-%d/%d' % (start, end - 1, size))
+            self.setHeader('Content-Length', end - start)
+            return StreamResult(stream, start, end)
+
+        boundary = uuid.uuid4().hex
+        content_type = self.getHeader('content-type')
+        parts = []
+        length = len(_closingBoundary(boundary))
+        for start, end in ranges:
+            part = '\r\n--%s\r\n' % boundary
+            if content_type:
+                part += 'Content-Type: %s\r\n' % content_type
+            part += 'Content-Range: bytes %d-%d/%d\r\n\r\n' % (
+                start, end - 1, size)
+            part = part.encode('latin-1')
+            parts.append((part, start, end))
+            length += len(part) + end - start
+        self.setHeader('Content-Type',
+                       'multipart/byteranges; boundary=%s' % boundary)
+        self.setHeader('Content-Length', length)
+        return ByteRangesResult(stream, parts, boundary)
+
+    def _etagResult(self, result):
+        # Publications enable ETags for string results by setting their
+        # ``etagPolicy`` attribute to 'strong' or 'weak'.
+        request = self._request
+        if (request is None or self._status != 200
+                or self.getHeader('etag') is not None):
+            return result
+        policy = getattr(getattr(request, 'publication', None),
+                         'etagPolicy', None)
+        if (policy not in ('strong', 'weak')
+                or getattr(request, 'method', 'GET') not in ('GET', 'HEAD')):
+            return result
+
+        sha1 = hashlib.sha1()
+        for chunk in result:
+            sha1.update(chunk)
+        etag = '"%s"' % sha1.hexdigest()
+        if policy == 'weak':
+            etag = 'W/' + etag
+        self.setHeader('ETag', etag)
+
+        if _etagMatches(request.getHeader('If-None-Match'), etag):
+            self._setNotModified()
+            return self._result
+        return result
+
+    def _setNotModified(self):
+        # Answer with a 304 Not Modified.  It has no body, and no
+        # Content-Length either, which would have to be the length of the
+        # full response (RFC 7230, section 3.3.2).
+        self.setStatus(304)
+        self._headers.pop('content-length', None)
+        self._result = ()
+
+    def _contentEncoding(self):
+        # The encoding to compress the response body with, or None.
+        request = self._request
+        status = self._status
+        if (request is None or not 200 <= status < 300 or status in (204, 206)
+                or self.getHeader('content-encoding')):
+            return None
+
+        content_type = self.getHeader('content-type', '').lower()
+        if not content_type.startswith(self.compress_types):
+            return None
+        length = self.getHeader('content-length')
+        if length is not None and int(length) < self.compress_min_size:
+            return None
+
+        # From here on the response depends on the Accept-Encoding header.
+        vary = self.getHeader('vary')
+        if not vary:
+            self.setHeader('Vary', 'Accept-Encoding')
+        elif 'accept-encoding' not in vary.lower():
+            self.setHeader('Vary', vary + ', Accept-Encoding')
+
+        return _negotiateContentEncoding(
+            request.getHeader('Accept-Encoding', ''))
+
+    def _compressResult(self, result, encoding):
+        self.setHeader('Content-Encoding', encoding)
+
+        if isinstance(result, tuple):
+            # A string result, see setResult.
+            compressor = _compressor(encoding, self.compress_level)
+            body = b''.join([compressor.compress(chunk) for chunk in result])
+            body += compressor.flush()
+            self.setHeader('Content-Length', len(body))
+            return (body,)
+
+        # The compressed length of other results isn't known in advance,
+        # the server has to use chunked transfer encoding instead.
+        self._headers.pop('content-length', None)
+        return CompressedResult(result, encoding, self.compress_level)
 
     def consumeBody(self):
         """See IHTTPResponse"""
+        if self._stream is not None:
+            self.setResult(None)
         return b''.join(self._result)
 
     def consumeBodyIter(self):
         """See IHTTPResponse"""
+        if self._stream is not None:
+            self.setResult(None)
         return self._result
 
+    def _textCharset(self):
+        # The Content-Type and the charset to encode text results with.
+        content_type = self.getHeader('content-type') or ''
+        if not unicode_mimetypes_re.match(content_type):
+            raise ValueError(
+                'Unicode results must have a text, RFC 3023, RFC 4627,'
+                ' or +xml content type.')
+
+        major, minor, params = _parseContentType(content_type)
+        if 'charset' in params:
+            return content_type, params['charset']
+        # Only negotiate a charset if the text needs one.
+        return content_type, getCharsetUsingRequest(self._request) or 'utf-8'
+
+    def _textResult(self, result):
+        content_type, encoding = self._textCharset()
+        if result.encoding is not None:
+            encoding = result.encoding
+            codecs.lookup(encoding)
+        else:
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = 'utf-8'
+        self.setHeader('Content-Type',
+                       _contentTypeWithCharset(content_type, encoding))
+        return TextResult(result.chunks, encoding, result.errors)
+
     def _implicitResult(self, body):
-        encoding = getCharsetUsingRequest(self._request) or 'utf-8'
         content_type = self.getHeader('content-type') or ''
 
         if isinstance(body, unicode):
-            ct = content_type
-            if not unicode_mimetypes_re.match(ct):
-                raise ValueError(
-                    'Unicode results must have a text, RFC 3023, RFC 4627,'
-                    ' or +xml content type.')
-
-            major, minor, params = zope.contenttype.parse.parse(ct)
-
-            if 'charset' in params:
-                encoding = params['charset']
-
+            content_type, encoding = self._textCharset()
             try:
                 body = body.encode(encoding)
             except (UnicodeEncodeError, LookupError):
@@ -871,14 +1291,7 @@ class HTTPResponse(BaseResponse):
                 encoding = 'utf-8'
                 body = body.encode(encoding)
 
-            if (major, minor) != ('application', 'json'):
-                # The RFC says this is UTF-8, and the type has no params.
-                params['charset'] = encoding
-            content_type = "%s/%s" % (major, minor)
-            if params:
-                content_type += ";"
-                content_type += ";".join(k + "=" + v
-                                         for k, v in params.items())
+            content_type = _contentTypeWithCharset(content_type, encoding)
 
         if content_type:
             headers = [('content-type', content_type),
@@ -893,17 +1306,21 @@ class HTTPResponse(BaseResponse):
         Calls self.setBody() with an error response.
         """
         t, v = exc_info[:2]
+        if self._stream is not None:
+            # The error replaces whatever the application wrote.
+            self._discardStream()
         if isinstance(t, CLASS_TYPES):
             if issubclass(t, Redirect):
                 self.redirect(v.getLocation(), trusted=v.getTrusted())
                 return
             title = tname = t.__name__
+            # Throwing non-protocol-specific exceptions is a good way
+            # for apps to control the status code.  Class names are never
+            # numeric, so look them up right away.
+            self.setStatus(status_codes.get(tname.lower(), 500))
         else:
             title = tname = to_unicode(t)
-
-        # Throwing non-protocol-specific exceptions is a good way
-        # for apps to control the status code.
-        self.setStatus(tname)
+            self.setStatus(tname)
 
         body = self._html(title, "A server error occurred.")
         self.setHeader("Content-Type", "text/html")
@@ -956,6 +1373,8 @@ class HTTPResponse(BaseResponse):
 
         self.setStatus(status)
         self.setHeader('Location', location)
+        if self._stream is not None:
+            self._discardStream()
         self.setResult(DirectResult(()))
         return location
 
@@ -992,12 +1411,207 @@ class HTTPResponse(BaseResponse):
                 c[name][k] = str(v)
         return str(c).splitlines()
 
-    def write(*_):
-        raise TypeError(
-            "The HTTP response write method is no longer supported. "
-            "See the file httpresults.txt in the zope.publisher package "
-            "for more information."
-        )
+    def _discardStream(self):
+        # Drop the data written so far.
+        stream, self._stream = self._stream, None
+        stream.close()
+
+    def write(self, data):
+        """See IHTTPResponse"""
+        stream = self._stream
+        if stream is None:
+            if self._result is not None:
+                raise ValueError(
+                    "Can't write to the response after setting a result.")
+            if not self._status_set:
+                self.setStatus(200)
+            stream = self._stream = tempfile.SpooledTemporaryFile(
+                STREAM_BUFFER_SIZE)
+        if isinstance(data, unicode):
+            content_type = self.getHeader('content-type') or ''
+            charset = 'utf-8'
+            if content_type:
+                major, minor, params = _parseContentType(content_type)
+                if 'charset' in params:
+                    charset = params['charset']
+                elif unicode_mimetypes_re.match(content_type):
+                    # Declare the charset, like for text results.
+                    self.setHeader(
+                        'Content-Type',
+                        _contentTypeWithCharset(content_type, charset))
+            data = data.encode(charset)
+        stream.write(data)
+
+
+# Parsed Content-Type headers, and the headers with their charset set,
+# shared by all responses.
+_content_types = Cache(1000)
+_charset_content_types = Cache(1000)
+
+
+def _parseContentType(content_type):
+    """Return the major type, minor type and parameters of a Content-Type.
+
+    The result is shared, its parameters must not be changed::
+
+      >>> _parseContentType('text/html;charset=utf-8')
+      ('text', 'html', {'charset': 'utf-8'})
+      >>> parsed = _parseContentType('text/plain')
+      >>> _parseContentType('text/plain') is parsed
+      True
+    """
+    parsed = _content_types.get(content_type)
+    if parsed is None:
+        parsed = zope.contenttype.parse.parse(content_type)
+        _content_types.set(content_type, parsed)
+    return parsed
+
+
+def _contentTypeWithCharset(content_type, charset):
+    """Return the Content-Type of text encoded with charset.
+
+      >>> _contentTypeWithCharset('text/html', 'utf-8')
+      'text/html;charset=utf-8'
+      >>> _contentTypeWithCharset('text/xml; charset=latin-1', 'utf-8')
+      'text/xml;charset=utf-8'
+
+    JSON is always UTF-8 and has no charset parameter::
+
+      >>> _contentTypeWithCharset('application/json', 'utf-8')
+      'application/json'
+    """
+    key = (content_type, charset)
+    result = _charset_content_types.get(key)
+    if result is None:
+        major, minor, params = _parseContentType(content_type)
+        params = dict(params)
+        if (major, minor) != ('application', 'json'):
+            # The RFC says this is UTF-8, and the type has no params.
+            params['charset'] = charset
+        result = "%s/%s" % (major, minor)
+        if params:
+            result += ";"
+            result += ";".join(k + "=" + v for k, v in params.items())
+        _charset_content_types.set(key, result)
+    return result
+
+
+# Negotiated content encodings by Accept-Encoding header, shared by all
+# requests.
+_content_encodings = Cache(1000)
+
+
+def _negotiateContentEncoding(accept):
+    """Return 'gzip' or 'deflate' as accepted by the client, or None.
+
+      >>> _negotiateContentEncoding('gzip, deflate, br')
+      'gzip'
+      >>> _negotiateContentEncoding('deflate, gzip;q=0.5')
+      'deflate'
+      >>> _negotiateContentEncoding('*;q=0, identity') is None
+      True
+    """
+    encoding = _content_encodings.get(accept, _marker)
+    if encoding is not _marker:
+        return encoding
+
+    qualities = {}
+    for item in accept.split(','):
+        params = item.split(';')
+        name = params[0].strip().lower()
+        quality = 1.0
+        for param in params[1:]:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == 'x-gzip':
+            name = 'gzip'
+        qualities[name] = quality
+    star = qualities.get('*', 0.0)
+
+    encoding = None
+    best = 0.0
+    for name in ('gzip', 'deflate'):
+        quality = qualities.get(name, star)
+        if quality > best:
+            encoding, best = name, quality
+
+    _content_encodings.set(accept, encoding)
+    return encoding
+
+
+def _streamSize(result):
+    """Return the size of the stream of a StreamResult, or None."""
+    stream = result.stream
+    try:
+        stream.seek(0, 2)
+        return stream.tell()
+    except (AttributeError, IOError, ValueError):
+        # Not seekable.
+        return None
+
+
+# More ranges are not worth the overhead, send the whole body instead.
+_MAX_BYTE_RANGES = 20
+
+
+def _parseByteRanges(header, size):
+    """Parse a Range header for a body of the given size.
+
+    Returns a list of (start, end) tuples (end is exclusive) of the
+    satisfiable ranges, or None if the header should be ignored.
+
+      >>> _parseByteRanges('bytes=0-99', 1000)
+      [(0, 100)]
+      >>> _parseByteRanges('bytes=500-, -100, 2000-', 1000)
+      [(500, 1000), (900, 1000)]
+      >>> _parseByteRanges('bytes=2000-', 1000)
+      []
+      >>> _parseByteRanges('items=0-1', 1000) is None
+      True
+      >>> _parseByteRanges('bytes=5-1', 1000) is None
+      True
+    """
+    unit, _, specs = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+    specs = specs.split(',')
+    if len(specs) > _MAX_BYTE_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        first, sep, last = spec.strip().partition('-')
+        try:
+            if not sep:
+                return None
+            if not first:
+                # A suffix range, the last bytes.
+                length = int(last)
+                if length > 0 and size:
+                    ranges.append((max(size - length, 0), size))
+                continue
+            start = int(first)
+            end = int(last) + 1 if last else None
+        except ValueError:
+            return None
+        if start < 0 or end is not None and end <= start:
+            return None
+        if start < size:
+            ranges.append((start, size if end is None else min(end, size)))
+    return ranges
+
+
+def _closingBoundary(boundary):
+    return ('\r\n--%s--\r\n' % boundary).encode('latin-1')
+
+
+def _compressor(encoding, level):
+    if encoding == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return zlib.compressobj(level)
 
 
 def sort_charsets(charset):
@@ -1017,6 +1631,12 @@ def extract_host(url):
     return host
 
 
+HTTP_CHARSETS_KEY = "zope.publisher.http.IUserPreferredCharsets"
+
+# Parsed Accept-Charset headers, shared by all requests.
+_charsets_cache = LRUCache(1000)
+
+
 @zope.interface.implementer(IUserPreferredCharsets)
 @zope.component.adapter(IHTTPRequest)
 class HTTPCharsets(object):
@@ -1026,10 +1646,27 @@ class HTTPCharsets(object):
 
     def getPreferredCharsets(self):
         '''See interface IUserPreferredCharsets'''
+        annotations = getattr(self.request, 'annotations', None)
+        if annotations is not None:
+            charsets = annotations.get(HTTP_CHARSETS_KEY)
+            if charsets is not None:
+                return charsets
+
+        header = self.request.get('HTTP_ACCEPT_CHARSET', '')
+        charsets = _charsets_cache.get(header)
+        if charsets is None:
+            charsets = tuple(self._parseAcceptCharset(header))
+            _charsets_cache.set(header, charsets)
+
+        if annotations is not None:
+            annotations[HTTP_CHARSETS_KEY] = charsets
+        return charsets
+
+    def _parseAcceptCharset(self, header):
         charsets = []
         sawstar = sawiso88591 = 0
-        header_present = bool(self.request.get('HTTP_ACCEPT_CHARSET'))
-        for charset in self.request.get('HTTP_ACCEPT_CHARSET', '').split(','):
+        header_present = bool(header)
+        for charset in header.split(','):
             charset = charset.strip().lower()
             if charset:
                 if ';' in charset:
@@ -1076,14 +1713,36 @@ class HTTPCharsets(object):
         return charsets
 
 
-def getCharsetUsingRequest(request):
-    'See IHTTPResponse'
+def getPreferredCharsetsUsingRequest(request):
+    """Return the charsets preferred by the user, or None if unknown.
+
+    The result of the IUserPreferredCharsets lookup is remembered on HTTP
+    requests, so that neither the adapter lookup nor the header parsing
+    is repeated for every use during a request.
+    """
+    charsets = getattr(request, '_preferred_charsets', None)
+    if charsets is not None:
+        return charsets
+
+    countLookup(request)
     envadapter = IUserPreferredCharsets(request, None)
     if envadapter is None:
+        return None
+
+    charsets = envadapter.getPreferredCharsets()
+    if isinstance(request, HTTPRequest):
+        request._preferred_charsets = charsets
+    return charsets
+
+
+def getCharsetUsingRequest(request):
+    'See IHTTPResponse'
+    charsets = getPreferredCharsetsUsingRequest(request)
+    if charsets is None:
         return
 
     try:
-        charset = envadapter.getPreferredCharsets()[0]
+        charset = charsets[0]
     except IndexError:
         # Exception caused by empty list! This is okay though, since the
         # browser just could have sent a '*', which means we can choose
@@ -1092,6 +1751,95 @@ def getCharsetUsingRequest(request):
     return charset
 
 
+@zope.interface.implementer(IResult)
+class StreamResult(object):
+    """A result reading from a seekable stream, such as a file.
+
+    Iterates over the stream (or the bytes from start up to, but not
+    including, end) in chunks and closes the stream when closed (WSGI
+    servers call `close` when done).  Data written with
+    `HTTPResponse.write` is returned this way, and applications can return
+    open files wrapped in it.  `HTTPResponse` serves byte ranges of these
+    results.
+    """
+
+    chunk_size = 65536
+
+    def __init__(self, stream, start=0, end=None):
+        self.stream = stream
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        stream = self.stream
+        stream.seek(self.start)
+        read = stream.read
+        chunk_size = self.chunk_size
+        remaining = None if self.end is None else self.end - self.start
+        while remaining is None or remaining > 0:
+            if remaining is None:
+                data = read(chunk_size)
+            else:
+                data = read(min(chunk_size, remaining))
+                remaining -= len(data)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        self.stream.close()
+
+
+@zope.interface.implementer(IResult)
+class ByteRangesResult(object):
+    """A multipart/byteranges body with several ranges of a stream.
+
+    ``parts`` is a sequence of (part header, start, end) tuples.
+    """
+
+    def __init__(self, stream, parts, boundary):
+        self.stream = stream
+        self.parts = parts
+        self.boundary = boundary
+
+    def __iter__(self):
+        for header, start, end in self.parts:
+            yield header
+            for data in StreamResult(self.stream, start, end):
+                yield data
+        yield _closingBoundary(self.boundary)
+
+    def close(self):
+        self.stream.close()
+
+
+@zope.interface.implementer(IResult)
+class CompressedResult(object):
+    """Compresses the chunks of another result while iterating.
+
+    Closing the result closes the wrapped result, if it can be closed.
+    """
+
+    def __init__(self, body, encoding, level=6):
+        self.body = body
+        self.encoding = encoding
+        self.level = level
+
+    def __iter__(self):
+        compressor = _compressor(self.encoding, self.level)
+        compress = compressor.compress
+        for chunk in self.body:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def close(self):
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+
+
 @zope.interface.implementer(IResult)
 class DirectResult(object):
     """A generic result object.
@@ -1110,6 +1858,42 @@ class DirectResult(object):
         return iter(self.body)
 
 
+@zope.interface.implementer(IResult)
+class TextResult(object):
+    """A result of text chunks that are encoded as they are sent.
+
+    Applications producing text piecewise, such as templates rendering in
+    chunks, can stream it this way without building the whole text or its
+    encoded form in memory.  Unless an encoding is given, `HTTPResponse`
+    encodes the chunks like text results: with the charset of the
+    Content-Type header or the one preferred by the request.  The charset
+    used is set in the Content-Type header.  Since it can't be changed once
+    sending started, characters it can't encode are replaced by character
+    references, unless different ``errors`` handling is given.
+    """
+
+    def __init__(self, chunks, encoding=None, errors='xmlcharrefreplace'):
+        self.chunks = chunks
+        self.encoding = encoding
+        self.errors = errors
+
+    def __iter__(self):
+        encode = codecs.getincrementalencoder(self.encoding or 'utf-8')(
+            self.errors).encode
+        for chunk in self.chunks:
+            data = encode(chunk)
+            if data:
+                yield data
+        data = encode(u'', True)
+        if data:
+            yield data
+
+    def close(self):
+        close = getattr(self.chunks, 'close', None)
+        if close is not None:
+            close()
+
+
 # BBB
 try:
     from zope.login.http import BasicAuthAdapter  # noqa: F401 import unused
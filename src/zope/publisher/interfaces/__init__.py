@@ -358,6 +358,83 @@ class IPublication(Interface):
         """
 
 
+class ITraversalCache(Interface):
+    """Cache of traversal results, shared between requests.
+
+    A publication opts in to traversal caching by providing an object
+    implementing this interface as its ``traversalCache`` attribute.
+    Requests then call `traverseName` of the cache instead of the
+    publication's.  Traversal hooks are still called for every object.
+
+    Cached steps skip ``publication.traverseName``, and with it any
+    authorization the publication does during traversal.
+    """
+
+    def getKey(request, ob):
+        """Return a stable, hashable key for ob, or None.
+
+        Children of objects without a key are never cached.  Include the
+        principal in the key if the publication's traversal checks
+        permissions.
+        """
+
+    def traverseName(publication, request, ob, name):
+        """Traverse to the next object, using the cache if possible.
+
+        On a cache miss, this calls ``publication.traverseName``.
+        Implementations may remember names that raised `NotFound` and
+        raise it again without traversing.
+        """
+
+    def invalidate(key):
+        """Forget the cached children and missing names of the object
+        with the given key.
+        """
+
+    def clear():
+        """Forget all cached traversal results.
+        """
+
+
+class ITraversalTracer(Interface):
+    """Collects timings of traversal steps.
+
+    A publication enables tracing by providing an object implementing
+    this interface as its ``traversalTracer`` attribute.
+    """
+
+    def record(request, ob, name, traverseTime, hooksTime, default):
+        """Record a traversal step.
+
+        ``ob`` is the object name was traversed from, ``traverseTime``
+        the time spent in ``publication.traverseName`` and ``hooksTime``
+        the time spent in ``publication.callTraversalHooks`` for the
+        traversed object, both in seconds.  ``default`` is true if the
+        step was added by a default traversal.
+        """
+
+    def getStatistics():
+        """Return the collected statistics.
+
+        The result maps the dotted names of the traversed classes to
+        mappings with the following keys:
+
+        steps
+            The number of recorded steps.
+
+        defaults
+            The number of steps added by default traversal.
+
+        traverseName, callTraversalHooks
+            Histograms of the times spent, as lists of counts per bucket
+            (see ``buckets``).
+        """
+
+    def clear():
+        """Forget the collected statistics.
+        """
+
+
 class IPublicationRequest(IParticipation):
     """Interface provided by requests to `IPublication` objects
     """
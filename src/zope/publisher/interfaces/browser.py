@@ -71,6 +71,12 @@ class IBrowserPublication(IPublication):
 
         Allows a default view to be added to traversal.
         Returns (ob, steps_reversed).
+
+        Publications that set a true ``cacheableDefaultTraversal``
+        attribute declare that, whenever ob itself is returned, the steps
+        only depend on the interfaces provided by the object and the
+        request.  The request then caches and reuses the steps for other
+        objects and requests providing the same interfaces.
         """
 
 
@@ -311,6 +311,33 @@ class IResult(Interface):
         """
 
 
+class ILastModified(Interface):
+    """The modification time of a published object.
+
+    If the traversed object can be adapted to this interface, the
+    publisher answers GET and HEAD requests with a matching
+    If-Modified-Since header with 304 (Not Modified) without calling the
+    object.
+    """
+
+    lastModified = Attribute(
+        "The modification time as a UTC datetime or a POSIX timestamp, "
+        "or None if unknown.")
+
+
+class IEntityTag(Interface):
+    """The entity tag of a published object.
+
+    If the traversed object can be adapted to this interface, the
+    publisher answers GET and HEAD requests with a matching If-None-Match
+    header with 304 (Not Modified) without calling the object.
+    """
+
+    entityTag = Attribute(
+        "The entity tag including the quotes (and the W/ prefix of weak "
+        "tags), or None if unknown.")
+
+
 class IHTTPResponse(IResponse):
     """An object representation of an HTTP response.
 
@@ -444,7 +471,9 @@ class IHTTPResponse(IResponse):
         defaulting to utf-8) and set the proper encoding information on
         the Content-Type header, if present.  Otherwise (the end result
         was not unicode) application is responsible for setting
-        Content-Type header encoding value as necessary.
+        Content-Type header encoding value as necessary.  A
+        zope.publisher.http.TextResult of unicode chunks is encoded the
+        same way, chunk by chunk as it is sent.
 
         If the result of the above is a string, set the Content-Length
         header, and make the string be the single member of an iterable
@@ -456,6 +485,26 @@ class IHTTPResponse(IResponse):
         Set the result of all of the above as the response's result. If
         the status has not been set, set it to 200 (OK). """
 
+    def write(data):
+        """Write part of the response body.
+
+        This is an alternative to returning a result for large bodies
+        that are produced piecewise.  The data is bytes, or unicode which
+        is encoded with the charset of the Content-Type header (utf-8 by
+        default, which is then added to a text Content-Type header).
+
+        The data is not streamed to the client: it is kept in a buffer of
+        bounded memory size (larger output is spooled to a temporary
+        file) and sent as the response body, after the headers, once
+        publishing is done.  Headers can therefore still be changed after
+        writing.  The first write sets the status to 200 (OK) if it has
+        not been set.
+
+        Resetting the response, handling an exception or redirecting
+        discards the written data.  Setting a non-empty result after
+        writing, or writing after setting a result, raises a ValueError.
+        """
+
     def consumeBody():
         """Returns the response body as a string.
 
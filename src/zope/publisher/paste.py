@@ -12,6 +12,8 @@
 #
 ##############################################################################
 
+import tempfile
+
 import pkg_resources
 
 import zope.publisher.browser
@@ -50,8 +52,14 @@ class Application:
         # Start the WSGI server response
         start_response(response.getStatusString(), response.getHeaders())
 
-        # Return the result body iterable.
-        return response.consumeBodyIter()
+        # Return the result body iterable, letting the server send whole
+        # files itself (e.g. with sendfile()) if it can.
+        body = response.consumeBodyIter()
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None and _isFileResult(body):
+            body.stream.seek(0)
+            return file_wrapper(body.stream, body.chunk_size)
+        return body
 
     def request(self, environ):
         method = environ.get('REQUEST_METHOD', 'GET').upper()
@@ -62,6 +70,26 @@ class Application:
         return rc(environ['wsgi.input'], environ)
 
 
+def _isFileResult(body):
+    """Is body a result sending a whole file with a real file descriptor?
+    """
+    if not isinstance(body, zope.publisher.http.StreamResult):
+        return False
+    if body.start or body.end is not None:
+        # The file wrapper would send the rest of the file.
+        return False
+    stream = body.stream
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        # Asking for the fileno would write an in-memory file to disk, and
+        # whether it is still in memory is private.
+        return False
+    try:
+        stream.fileno()
+    except (AttributeError, IOError, ValueError):
+        return False
+    return True
+
+
 def get_egg(name, group):
     if '#' in name:
         egg, entry_point = name.split('#', 1)
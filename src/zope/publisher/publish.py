@@ -15,7 +15,11 @@
 
 Provide an apply-like facility that works with any mapping object
 """
+import calendar
 import sys
+from email.utils import formatdate
+from email.utils import mktime_tz
+from email.utils import parsedate_tz
 
 import six
 
@@ -25,6 +29,9 @@ from zope.proxy import removeAllProxies
 from zope import component
 from zope.publisher.interfaces import IReRaiseException
 from zope.publisher.interfaces import Retry
+from zope.publisher.interfaces.http import IEntityTag
+from zope.publisher.interfaces.http import IHTTPRequest
+from zope.publisher.interfaces.http import ILastModified
 
 
 _marker = object()  # Create a new marker object.
@@ -130,6 +137,96 @@ def debug_call(obj, args):
     return obj(*args)
 
 
+LOOKUP_COUNT_KEY = "zope.publisher.publish.lookups"
+
+
+def countLookup(request, count=1):
+    """Count component lookups made on behalf of a request.
+
+    The count is kept in the request annotations, if the request has
+    any.
+    """
+    annotations = getattr(request, 'annotations', None)
+    if annotations is not None:
+        annotations[LOOKUP_COUNT_KEY] = (
+            annotations.get(LOOKUP_COUNT_KEY, 0) + count)
+
+
+def getLookupCount(request):
+    """Return the number of component lookups counted for a request."""
+    annotations = getattr(request, 'annotations', None)
+    if annotations is None:
+        return 0
+    return annotations.get(LOOKUP_COUNT_KEY, 0)
+
+
+def _notModified(request, obj):
+    """Evaluate the conditional headers of a request before rendering.
+
+    Sets the ETag and Last-Modified headers known from `IEntityTag` and
+    `ILastModified` adapters of the object and returns True (after making
+    the response an empty 304) if the client's copy is still valid.
+    """
+    if (not IHTTPRequest.providedBy(request)
+            or request.method not in ('GET', 'HEAD')):
+        return False
+    response = request.response
+
+    countLookup(request)
+    adapter = IEntityTag(obj, None)
+    etag = adapter.entityTag if adapter is not None else None
+    countLookup(request)
+    adapter = ILastModified(obj, None)
+    modified = adapter.lastModified if adapter is not None else None
+    if modified is not None and not isinstance(modified, (int, float)):
+        modified = calendar.timegm(modified.utctimetuple())
+
+    if etag is not None:
+        response.setHeader('ETag', etag)
+    if modified is not None:
+        response.setHeader('Last-Modified', formatdate(modified, usegmt=True))
+
+    if_none_match = request.getHeader('If-None-Match')
+    if if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since.
+        match = etag is not None and _etagMatches(if_none_match, etag)
+    else:
+        since = request.getHeader('If-Modified-Since')
+        if not since or modified is None:
+            return False
+        since = parsedate_tz(since.split(';')[0])
+        match = since is not None and int(modified) <= mktime_tz(since)
+
+    if match:
+        response._setNotModified()
+    return match
+
+
+def _etagMatches(header, etag):
+    """Does an If-None-Match header match the ETag (weak comparison)?
+
+      >>> _etagMatches('"a", W/"b"', '"b"')
+      True
+      >>> _etagMatches('*', 'W/"c"')
+      True
+      >>> _etagMatches('"a"', '"b"') or _etagMatches(None, '"b"')
+      False
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
 def publish(request, handle_errors=True):
     try:  # finally to clean up to_raise and close request
         to_raise = None
@@ -147,10 +244,13 @@ def publish(request, handle_errors=True):
                             obj = request.traverse(obj)
                             publication.afterTraversal(request, obj)
 
-                            result = publication.callObject(request, obj)
-                            response = request.response
-                            if result is not response:
-                                response.setResult(result)
+                            # Don't call the object if the response is a
+                            # 304 Not Modified already.
+                            if not _notModified(request, obj):
+                                result = publication.callObject(request, obj)
+                                response = request.response
+                                if result is not response:
+                                    response.setResult(result)
 
                             publication.afterCall(request, obj)
 
@@ -162,6 +262,7 @@ def publish(request, handle_errors=True):
                             if not handle_errors:
                                 # Reraise only if there is no adapter
                                 # indicating that we shouldn't
+                                countLookup(request)
                                 reraise = component.queryAdapter(
                                     exc_info[1], IReRaiseException,
                                     default=None)
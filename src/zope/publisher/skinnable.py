@@ -21,6 +21,34 @@ import zope.interface
 import zope.interface.interfaces
 
 from zope.publisher import interfaces
+from zope.publisher._cache import Cache
+from zope.publisher.publish import countLookup
+
+
+# Instance declarations of skinned requests, keyed on the request class,
+# the previous declaration (if any) and the skin.  This saves rebuilding the
+# list of directly provided interfaces every time a skin is applied.
+_skin_specs = Cache(1000)
+
+
+def _provideSkin(request, skin, replace):
+    cls = request.__class__
+    previous = None if replace else getattr(request, '__provides__', None)
+    key = (cls, previous, skin)
+    spec = _skin_specs.get(key)
+    if spec is None:
+        if replace:
+            ifaces = [skin]
+        else:
+            # Remove all existing skin type declarations (commonly the
+            # default skin) based on the given skin type.
+            ifaces = [iface
+                      for iface in zope.interface.directlyProvidedBy(request)
+                      if not interfaces.ISkinType.providedBy(iface)]
+            ifaces.append(skin)
+        spec = zope.interface.Provides(cls, *ifaces)
+        _skin_specs.set(key, spec)
+    request.__provides__ = spec
 
 
 @zope.interface.implementer(interfaces.ISkinChangedEvent)
@@ -38,18 +66,20 @@ def getDefaultSkin(request):
 
 def setDefaultSkin(request):
     """Sets the default skin for a given request."""
+    # The adapter registry caches these lookups itself.
     adapters = zope.component.getSiteManager().adapters
-    skin = adapters.lookup((zope.interface.providedBy(request),),
-                           interfaces.IDefaultSkin, '')
+    required = (zope.interface.providedBy(request),)
+    countLookup(request)
+    skin = adapters.lookup(required, interfaces.IDefaultSkin, '')
     if skin is None:
         # Find a named ``default`` adapter providing IDefaultSkin as fallback.
-        skin = adapters.lookup((zope.interface.providedBy(request),),
-                               interfaces.IDefaultSkin, 'default')
-        if skin is None:
-            # Let's be nice and continue to work for IBrowserRequest's
-            # without relying on adapter registrations.
-            if interfaces.browser.IBrowserRequest.providedBy(request):
-                skin = getDefaultSkin
+        countLookup(request)
+        skin = adapters.lookup(required, interfaces.IDefaultSkin, 'default')
+    if skin is None:
+        # Let's be nice and continue to work for IBrowserRequest's
+        # without relying on adapter registrations.
+        if interfaces.browser.IBrowserRequest.providedBy(request):
+            skin = getDefaultSkin
     if skin is not None:
         if not zope.interface.interfaces.IInterface.providedBy(skin):
             # The default fallback skin is registered as a named adapter.
@@ -61,7 +91,7 @@ def setDefaultSkin(request):
             pass
         if interfaces.ISkinType.providedBy(skin):
             # silently ignore skins which do not provide ISkinType
-            zope.interface.directlyProvides(request, skin)
+            _provideSkin(request, skin, True)
         else:
             raise TypeError("Skin interface %r doesn't provide ISkinType" %
                             skin)
@@ -69,11 +99,5 @@ def setDefaultSkin(request):
 
 def applySkin(request, skin):
     """Change the presentation skin for this request."""
-    # Remove all existing skin type declarations (commonly the default skin)
-    # based on the given skin type.
-    ifaces = [iface for iface in zope.interface.directlyProvidedBy(request)
-              if not interfaces.ISkinType.providedBy(iface)]
-    # Add the new skin.
-    ifaces.append(skin)
-    zope.interface.directlyProvides(request, *ifaces)
+    _provideSkin(request, skin, False)
     zope.event.notify(SkinChangedEvent(request))
@@ -58,6 +58,13 @@ class BrowserLanguagesTest(unittest.TestCase):
             self.assertEqual(list(browser_languages.getPreferredLanguages()),
                              expected)
 
+    def test_shared_between_requests(self):
+        first = self.factory(TestRequest("da, en;q=0.5"))
+        second = self.factory(TestRequest("da, en;q=0.5"))
+        languages = first.getPreferredLanguages()
+        self.assertEqual(languages, ("da", "en"))
+        self.assertIs(second.getPreferredLanguages(), languages)
+
 
 class CacheableBrowserLanguagesTests(BrowserLanguagesTest):
 
@@ -86,6 +93,9 @@ class ModifiableBrowserLanguagesTests(CacheableBrowserLanguagesTests):
         browser_languages.setPreferredLanguages(["ru", "en"])
         self.assertTrue(request.localized)
         eq(list(browser_languages.getPreferredLanguages()), ["ru", "en"])
+        # The override only applies to this request.
+        other = self.factory(TestRequest("da, en, pt"))
+        eq(list(other.getPreferredLanguages()), ["da", "en", "pt"])
 
     def test_conflicting_adapters(self):
         request = TestRequest("da, en, pt")
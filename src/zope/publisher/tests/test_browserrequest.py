@@ -17,6 +17,7 @@ import sys
 import unittest
 from io import BytesIO
 
+from zope.interface import alsoProvides
 from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
@@ -29,6 +30,8 @@ from zope.publisher.interfaces import NotFound
 from zope.publisher.interfaces.browser import IBrowserApplicationRequest
 from zope.publisher.interfaces.browser import IBrowserPublication
 from zope.publisher.interfaces.browser import IBrowserRequest
+from zope.publisher.interfaces.http import IEntityTag
+from zope.publisher.interfaces.http import ILastModified
 from zope.publisher.publish import publish as publish_
 from zope.publisher.tests.basetestiapplicationrequest import \
     BaseTestIApplicationRequest
@@ -38,6 +41,7 @@ from zope.publisher.tests.basetestipublisherrequest import \
     BaseTestIPublisherRequest
 from zope.publisher.tests.publication import TestPublication
 from zope.publisher.tests.test_http import HTTPTests
+from zope.publisher.traversal import TraversalTracer
 
 
 EMPTY_FILE_BODY = b"""-----------------------------1
@@ -294,6 +298,81 @@ class BrowserTests(HTTPTests):
         self.assertEqual(response.getBase(),
                          'http://foobar.com/folder/item2/view/index')
 
+    def testTraversalTracer(self):
+        extra = {'PATH_INFO': '/folder/item2/'}
+        request = self._createRequest(extra)
+        tracer = request.publication.traversalTracer = TraversalTracer()
+        publish(request)
+        stats = tracer.getStatistics()
+        prefix = __name__ + '.'
+        self.assertEqual(
+            sorted((name[len(prefix):], value['steps'], value['defaults'])
+                   for name, value in stats.items()),
+            [('AppRoot', 1, 0), ('Folder', 1, 0), ('Item2', 1, 1),
+             ('View', 1, 1)])
+        self.assertEqual(sum(stats[prefix + 'View']['traverseName']), 1)
+        self.assertEqual(sum(stats[prefix + 'View']['callTraversalHooks']), 1)
+
+    def testCacheableDefaultTraversal(self):
+        calls = []
+
+        class CachingPublication(Publication):
+            cacheableDefaultTraversal = True
+
+            def getDefaultTraversal(self, request, ob):
+                calls.append(ob)
+                return Publication.getDefaultTraversal(self, request, ob)
+
+        publication = CachingPublication(self.app)
+        for i in range(2):
+            request = self._createRequest({'PATH_INFO': '/folder/item2/'})
+            request.setPublication(publication)
+            publish(request)
+            self.assertEqual(request.response.getBase(),
+                             'http://foobar.com/folder/item2/view/index')
+        # item2, view and the index method are looked up only once.
+        self.assertEqual(len(calls), 3)
+
+    def testConditionalEntityTag(self):
+        item = self.app.folder.item
+        item.entityTag = '"v1"'
+        alsoProvides(item, IEntityTag)
+
+        request = self._createRequest({'HTTP_IF_NONE_MATCH': 'W/"v1"'})
+        publish(request)
+        self.assertEqual(request.response.getStatus(), 304)
+        self.assertEqual(request.response.consumeBody(), b'')
+        self.assertEqual(request.response.getHeader('ETag'), '"v1"')
+        # No Content-Length, nor a guessed Content-Type for the empty body.
+        headers = dict(request.response.getHeaders())
+        self.assertNotIn('Content-Length', headers)
+        self.assertNotIn('Content-Type', headers)
+
+        request = self._createRequest({'HTTP_IF_NONE_MATCH': '"v0"'})
+        publish(request)
+        self.assertEqual(request.response.getStatus(), 200)
+        self.assertEqual(request.response.consumeBody(), b"'5', 6")
+        self.assertEqual(request.response.getHeader('ETag'), '"v1"')
+
+    def testConditionalLastModified(self):
+        import datetime
+        item = self.app.folder.item
+        item.lastModified = datetime.datetime(2020, 1, 1, 12)
+        alsoProvides(item, ILastModified)
+
+        request = self._createRequest(
+            {'HTTP_IF_MODIFIED_SINCE': 'Wed, 01 Jan 2020 12:00:00 GMT'})
+        publish(request)
+        self.assertEqual(request.response.getStatus(), 304)
+        self.assertEqual(request.response.consumeBody(), b'')
+
+        request = self._createRequest(
+            {'HTTP_IF_MODIFIED_SINCE': 'Wed, 01 Jan 2020 11:59:59 GMT'})
+        publish(request)
+        self.assertEqual(request.response.getStatus(), 200)
+        self.assertEqual(request.response.getHeader('Last-Modified'),
+                         'Wed, 01 Jan 2020 12:00:00 GMT')
+
     def testBadPath(self):
         extra = {'PATH_INFO': '/folder/nothere/'}
         request = self._createRequest(extra)
@@ -764,6 +843,18 @@ class BrowserTests(HTTPTests):
         self.assertEqual(request.bodyStream.read(), b'')
         self.assertEqual(dict(request.form), dict(x='1', y='2'))
 
+    def testFormMappingPrecedence(self):
+        request = self._createRequest(
+            {'QUERY_STRING': 'a=form&c=form', 'HTTP_COOKIE': 'a=1; c=2; d=3'})
+        request.processInputs()
+        self.assertEqual(request['a'], u'form')
+        self.assertEqual(request['c'], u'form')
+        self.assertEqual(request['d'], u'3')
+        items = request.items()
+        self.assertEqual(len(items), len(request))
+        self.assertEqual(len(dict(items)), len(items))
+        self.assertEqual(dict(items)['a'], u'form')
+
 
 @implementer(IBrowserPublication)
 class TestBrowserPublication(TestPublication):
@@ -104,6 +104,19 @@ class TestBrowserResponse(TestCase):
             response.getHeader('content-type').startswith("text/plain")
         )
 
+    def test_contentType_DWIM_looks_at_start_only(self):
+        # Only the start of a body is examined, so a large body is neither
+        # decoded nor searched as a whole.
+        response = BrowserResponse()
+        response.setResult(b'<html><body>' + b'x' * 100000 + b'\xff')
+        self.assertTrue(
+            response.getHeader('content-type').startswith("text/html"))
+
+        response = BrowserResponse()
+        response.setResult(b'<!--' + b' ' * 100000 + b'--><html>')
+        self.assertTrue(
+            response.getHeader('content-type').startswith("text/plain"))
+
     def test_not_DWIM_for_304_response(self):
         # Don't guess the content type with 304 responses which MUST NOT /
         # SHOULD NOT include it.
@@ -121,7 +134,8 @@ class TestBrowserResponse(TestCase):
         response = BrowserResponse()
         response.setHeader('content-type', 'text/html')
 
-        insertBase = response._BrowserResponse__insertBase
+        def insertBase(body):
+            return b''.join(response._BrowserResponse__insertBase(body))
 
         # Make sure that bases are inserted
         response.setBase('http://localhost/folder/')
@@ -142,6 +156,32 @@ class TestBrowserResponse(TestCase):
         self.assertIsInstance(body, bytes)
         self.assertIn(b'<base href="http://localhost/folder" />', result)
 
+    def testInsertBaseChunks(self):
+        # The body isn't copied into a new string, the base tag is inserted
+        # as a separate chunk.
+        response = BrowserResponse()
+        response.setHeader('content-type', 'text/html')
+        response.setBase('http://localhost/folder/')
+        response.setResult(b'<html><head></head><body>Page</body></html>')
+        self.assertEqual(
+            list(response.consumeBodyIter()),
+            [b'<html><head>',
+             b'\n<base href="http://localhost/folder/" />\n',
+             b'</head><body>Page</body></html>'])
+
+        # Only the start of the body is searched for the tags.
+        from zope.publisher.browser import _HEAD_SEARCH_SIZE
+        for body in [
+                b' ' * _HEAD_SEARCH_SIZE + b'<html><head></head></html>',
+                b'<html><head><base href="/" /></head></html>']:
+            response = BrowserResponse()
+            response.setHeader('content-type', 'text/html')
+            response.setBase('http://localhost/folder/')
+            response.setResult(body)
+            self.assertEqual(list(response.consumeBodyIter()), [body])
+            self.assertEqual(response.getHeader('content-length'),
+                             str(len(body)))
+
     def testInsertBaseInSetResultUpdatesContentLength(self):
         # Make sure that the Content-Length header is updated to account
         # for an inserted <base> tag.
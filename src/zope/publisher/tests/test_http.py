@@ -41,6 +41,7 @@ from zope.publisher.interfaces.http import IHTTPApplicationResponse
 from zope.publisher.interfaces.http import IHTTPRequest
 from zope.publisher.interfaces.http import IHTTPResponse
 from zope.publisher.interfaces.logginginfo import ILoggingInfo
+from zope.publisher.publish import getLookupCount
 from zope.publisher.publish import publish
 from zope.publisher.testing import output_checker
 from zope.publisher.tests.basetestiapplicationrequest import \
@@ -389,7 +390,9 @@ class HTTPTests(unittest.TestCase):
 
         self.assertEqual(req['SERVER_URL'], 'http://foobar.com')
         self.assertEqual(req['HTTP_HOST'], 'foobar.com')
-        self.assertEqual(req['PATH_INFO'], '/folder/item')
+        self.assertEqual(req['PATH_INFO'], u'/folder/item')
+        # Also an ASCII byte string on Python 2.
+        self.assertIsInstance(req['PATH_INFO'], type(u''))
         self.assertEqual(req['CONTENT_LENGTH'], '0')
         self.assertRaises(KeyError, req.__getitem__, 'HTTP_AUTHORIZATION')
         self.assertEqual(req['GATEWAY_INTERFACE'], 'TestFooInterface/1.0')
@@ -483,6 +486,19 @@ class HTTPTests(unittest.TestCase):
         # Reserved key
         self.assertNotIn('path', req.cookies)
 
+    def testMappingPrecedence(self):
+        req = self._createRequest(extra_env={'HTTP_COOKIE': 'a=cookie'})
+        # Cookies shadow environment variables of the same name.
+        self.assertEqual(req['a'], 'cookie')
+        self.assertEqual(req.get('HTTP_HOST'), 'foobar.com')
+        self.assertEqual(dict(req.items())['a'], 'cookie')
+        self.assertEqual(len(req), len(set(req.keys())))
+        self.assertEqual(sorted(req), sorted(req.keys()))
+        self.assertEqual(len(req.keys()), len(req))
+        self.assertIsInstance(req.keys(), list)
+        self.assertIn('a', req.keys())
+        self.assertEqual(list(req.values()), [req[key] for key in req])
+
     def testCookieErrorToLog(self):
         from zope.testing.loggingsupport import InstalledHandler
         cookies = {
@@ -534,6 +550,30 @@ class HTTPTests(unittest.TestCase):
         self.assertEqual(req.getHeader('Another-Test', literal=True),
                          'another')
 
+    def testHeadersWithPrefix(self):
+        req = self._createRequest(extra_env={'CONTENT_TYPE': 'text/plain'})
+        self.assertEqual(req.getHeader('Off-The-Wall'), "Spam 'n eggs")
+        self.assertEqual(req.getHeader('HTTP_OFF_THE_WALL'), "Spam 'n eggs")
+        self.assertEqual(req.getHeader('OFF_THE_WALL', literal=True),
+                         "Spam 'n eggs")
+        self.assertEqual(req.getHeader('Content-Type'), 'text/plain')
+        self.assertEqual(req.getHeader('No-Such-Header', 'default'),
+                         'default')
+        # Repeated lookups use the same normalized names.
+        self.assertEqual(req.getHeader('off-the-wall'), "Spam 'n eggs")
+
+    def testIterHeaders(self):
+        req = self._createRequest(extra_env={'CONTENT_TYPE': 'text/plain'})
+        self.assertEqual(
+            sorted(req.iterHeaders()),
+            [('Accept-Charset', 'ISO-8859-1, UTF-8;q=0.66, UTF-16;q=0.33'),
+             ('Content-Length', '0'),
+             ('Content-Type', 'text/plain'),
+             ('Host', 'foobar.com'),
+             ('Off-The-Wall', "Spam 'n eggs")])
+        for name, value in req.iterHeaders():
+            self.assertEqual(req.getHeader(name), value)
+
     def testBasicAuth(self):
         import base64
 
@@ -618,6 +658,55 @@ class HTTPTests(unittest.TestCase):
         req._vh_root = object()
         self.assertEqual(req.getVirtualHostRoot(), req._vh_root)
 
+    def testLookupCount(self):
+        req = self._createRequest()
+        # At least the IUserPreferredLanguages lookup of setupLocale.
+        count = getLookupCount(req)
+        self.assertTrue(count >= 1)
+        req.setPrincipal(None)
+        self.assertEqual(getLookupCount(req), count + 1)
+        self.assertEqual(getLookupCount(object()), 0)
+
+    def testLookupCountResult(self):
+        # The charset is only negotiated for text results without one.
+        req = self._createRequest()
+        count = getLookupCount(req)
+        req.response.setResult(b'data')
+        self.assertEqual(getLookupCount(req), count)
+        req.response.setHeader('Content-Type', 'text/plain;charset=utf-8')
+        req.response.setResult(u'data')
+        self.assertEqual(getLookupCount(req), count)
+        req.response.setHeader('Content-Type', 'text/plain')
+        req.response.setResult(u'data')
+        self.assertEqual(getLookupCount(req), count + 1)
+        self.assertEqual(req.response.getHeader('Content-Type'),
+                         'text/plain;charset=utf-8')
+
+    def test_URLCache(self):
+        req = self._createRequest({'PATH_INFO': '/folder/item'})
+        self.assertEqual(req.getURL(), 'http://foobar.com')
+        req.setTraversalStack(['item'])
+        req.traverse(self.app.folder)
+        self.assertEqual(req.getURL(), 'http://foobar.com/item')
+        self.assertIs(req.getURL(), req.getURL())
+        self.assertEqual(req.getURL(1), 'http://foobar.com')
+        self.assertEqual(req.getApplicationURL(1), 'http://foobar.com/item')
+        self.assertEqual(str(req.URL), 'http://foobar.com/item')
+
+        req.setApplicationServer('example.com', proto='https')
+        self.assertEqual(req.getURL(), 'https://example.com/item')
+        self.assertEqual(req.getURL(path_only=True), '/item')
+
+        req.shiftNameToApplication()
+        self.assertEqual(req.getURL(), 'https://example.com/item')
+        self.assertEqual(req.getApplicationURL(), 'https://example.com/item')
+
+        req.setVirtualHostRoot(['vh', u'\u00e4'])
+        self.assertEqual(req.getURL(), 'https://example.com/vh/%C3%A4')
+        self.assertEqual(req.getApplicationURL(path_only=True),
+                         '/vh/%C3%A4')
+        self.assertRaises(IndexError, req.getURL, 3)
+
     def test_traverse(self):
         req = self._createRequest()
         req.traverse(self.app)
@@ -699,11 +788,161 @@ class HTTPTests(unittest.TestCase):
         self.assertEqual(req['PATH_INFO'],
                          u'/\u00e4\u00f6/\u00fc\u00df/foo/bar.html')
 
-    def testResponseWriteFaile(self):
-        self.assertRaises(TypeError,
-                          self._createRequest().response.write,
-                          'some output',
-                          )
+    def testEnvironmentCopyOnWrite(self):
+        env = self._testEnv.copy()
+        env.update({'REDIRECT_SCRIPT_NAME': '/app',
+                    'HTTP_CGI_AUTHORIZATION': 'Basic Zm9vOmJhcg==',
+                    'PATH_INFO': '/\xc3\xa4'})
+        del env['HTTP_AUTHORIZATION']
+        orig = env.copy()
+        request = HTTPRequest(BytesIO(b''), env)
+        self.assertEqual(request._environ['SCRIPT_NAME'], '/app')
+        self.assertNotIn('REDIRECT_SCRIPT_NAME', request._environ)
+        self.assertNotIn('HTTP_CGI_AUTHORIZATION', request._environ)
+        self.assertNotIn('HTTP_AUTHORIZATION', request._environ)
+        self.assertEqual(request._authUserPW(), (b'foo', b'bar'))
+        self.assertEqual(request._environ['PATH_INFO'], u'/\u00e4')
+        self.assertEqual(request.getApplicationURL(), 'http://foobar.com/app')
+
+        request._environ['QUERY_STRING'] = 'x=1'
+        del request._environ['HTTP_OFF_THE_WALL']
+        self.assertEqual(len(request._environ), len(list(request._environ)))
+        self.assertEqual(env, orig)
+        self.assertEqual(request.retry().getHeader('Off-The-Wall'),
+                         "Spam 'n eggs")
+
+    def testResponseWrite(self):
+        response = self._createRequest().response
+        response.setHeader('Content-Type', 'text/csv;charset=latin-1')
+        response.write(b'a,b\n')
+        response.write(u'\xe4,c\n')
+        self.assertEqual(response.getStatus(), 200)
+        response.setResult(None)
+        body = response.consumeBodyIter()
+        self.addCleanup(body.close)
+        self.assertEqual(response.getHeader('Content-Length'), '8')
+        self.assertEqual(response.consumeBody(), b'a,b\n\xe4,c\n')
+        self.assertEqual(list(body), [b'a,b\n\xe4,c\n'])
+
+    def testResponseWriteWithoutResult(self):
+        # A view may write and then return the response itself, in which
+        # case no result is set.
+        response = self._createRequest().response
+        response.write(b'data')
+        body = response.consumeBodyIter()
+        self.addCleanup(body.close)
+        self.assertEqual(list(body), [b'data'])
+        self.assertEqual(response.getHeader('Content-Length'), '4')
+
+        response = self._createRequest().response
+        response.write(b'data')
+        self.assertEqual(response.consumeBody(), b'data')
+        response.consumeBodyIter().close()
+
+    def testResponseWriteException(self):
+        response = self._createRequest().response
+        response.write(b'partial')
+        try:
+            raise ValueError('oops')
+        except ValueError:
+            response.handleException(sys.exc_info())
+        self.assertEqual(response.getStatus(), 500)
+        self.assertIn(b'ValueError', response.consumeBody())
+
+        response = self._createRequest().response
+        response.write(b'partial')
+        response.redirect('/elsewhere')
+        self.assertEqual(response.getStatus(), 302)
+        self.assertEqual(response.consumeBody(), b'')
+
+    def testResponseWriteLarge(self):
+        from zope.publisher.http import STREAM_BUFFER_SIZE
+        from zope.publisher.http import StreamResult
+        response = self._createRequest().response
+        for i in range(STREAM_BUFFER_SIZE // 1000 + 1):
+            response.write(b'x' * 1000)
+        response.setResult(None)
+        body = response.consumeBodyIter()
+        self.addCleanup(body.close)
+        chunks = list(body)
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [StreamResult.chunk_size, 1000 - 536])
+
+    def testResponseWriteErrors(self):
+        response = self._createRequest().response
+        response.write(b'partial')
+        self.assertRaises(ValueError, response.setResult, b'other')
+        # Resetting, e.g. to render an error, discards the written data.
+        response.reset()
+        response.setResult(b'error')
+        self.assertEqual(response.consumeBody(), b'error')
+        # Writing after setting a result would lose the data.
+        self.assertRaises(ValueError, response.write, b'lost')
+        response.reset()
+        response.write(b'data')
+        response.setResult(None)
+        self.assertEqual(response.consumeBody(), b'data')
+        response.consumeBodyIter().close()
+
+    def testResponseWriteCharset(self):
+        response = self._createRequest().response
+        response.setHeader('Content-Type', 'text/html')
+        response.write(u'\u00e4')
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/html;charset=utf-8')
+        self.assertEqual(response.consumeBody(), b'\xc3\xa4')
+        response.consumeBodyIter().close()
+
+        response = self._createRequest().response
+        response.setHeader('Content-Type', 'text/plain;charset=latin-1')
+        response.write(u'\u00e4')
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/plain;charset=latin-1')
+        self.assertEqual(response.consumeBody(), b'\xe4')
+        response.consumeBodyIter().close()
+
+    def test_deepPath(self):
+        names = ['level%d' % i for i in range(15)]
+        path = '/' + '/'.join(names) + '/./x/../'
+        request = self._createRequest({'PATH_INFO': path})
+        expected = list(reversed(names + ['..']))
+        self.assertEqual(request.getTraversalStack(), expected)
+        self.assertTrue(request._endswithslash)
+
+        # The parsed path is shared, but each request has its own stack.
+        other = self._createRequest({'PATH_INFO': path})
+        request._traversal_stack.pop()
+        self.assertEqual(other.getTraversalStack(), expected)
+
+        request = self._createRequest({'PATH_INFO': path[:-1]})
+        self.assertFalse(request._endswithslash)
+
+    def testTextResult(self):
+        from zope.publisher.http import TextResult
+        closed = []
+
+        def render():
+            try:
+                yield u'\u20ac'
+                yield u'\u00e4'
+            finally:
+                closed.append(True)
+
+        request = self._createRequest({'HTTP_ACCEPT_CHARSET': 'ISO-8859-1'})
+        provideAdapter(HTTPCharsets)
+        response = request.response
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(TextResult(render()))
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/plain;charset=iso-8859-1')
+        self.assertEqual(response.getHeader('Content-Length'), None)
+        result = response.consumeBodyIter()
+        # Nothing is encoded before the body is sent.
+        self.assertEqual(closed, [])
+        # The euro sign isn't in latin-1.
+        self.assertEqual(b''.join(result), b'&#8364;\xe4')
+        result.close()
+        self.assertEqual(closed, [True])
 
     def test_PathTrailingWhitespace(self):
         request = self._createRequest({'PATH_INFO': '/test '})
@@ -813,6 +1052,302 @@ class TestHTTPResponse(unittest.TestCase):
         response.setResult(body)
         return self._parseResult(response)
 
+    def testTextResultCharset(self):
+        from zope.publisher.http import TextResult
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/xml; charset=utf-16')
+        response.setResult(TextResult([u'<a/>', u'<b/>']))
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/xml;charset=utf-16')
+        # A single byte order mark for the whole body.
+        self.assertEqual(response.consumeBody(),
+                         u'<a/><b/>'.encode('utf-16'))
+
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/plain;charset=unknown')
+        response.setResult(TextResult([u'\u00e4']))
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/plain;charset=utf-8')
+        self.assertEqual(response.consumeBody(), b'\xc3\xa4')
+
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'image/png')
+        self.assertRaises(ValueError, response.setResult,
+                          TextResult([u'data']))
+
+    def testTextResultEncoding(self):
+        from zope.publisher.http import TextResult
+
+        # An explicit encoding overrides the charset of the Content-Type.
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/plain;charset=utf-8')
+        response.setResult(TextResult([u'\u00e4\u20ac'], 'latin-1'))
+        self.assertEqual(response.getHeader('Content-Type'),
+                         'text/plain;charset=latin-1')
+        self.assertEqual(response.consumeBody(), b'\xe4&#8364;')
+
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(TextResult([u'\u20ac'], 'latin-1', 'replace'))
+        self.assertEqual(response.consumeBody(), b'?')
+
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(TextResult([u'\u20ac'], 'latin-1', 'strict'))
+        self.assertRaises(UnicodeEncodeError, response.consumeBody)
+
+        response = self._createResponse()
+        response.setHeader('Content-Type', 'text/plain')
+        self.assertRaises(LookupError, response.setResult,
+                          TextResult([u'data'], 'unknown'))
+
+    def _createCompressingResponse(self, accept='gzip, deflate'):
+        class Publication(object):
+            compressResponses = True
+
+        env = {'HTTP_ACCEPT_ENCODING': accept} if accept else {}
+        request = HTTPRequest(BytesIO(b''), env)
+        request.setPublication(Publication())
+        return request.response
+
+    def testCompressString(self):
+        import zlib
+        body = b'<html>' + b'x' * 2000 + b'</html>'
+        response = self._createCompressingResponse()
+        response.setHeader('Content-Type', 'text/html')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(headers['Content-Length']), len(result))
+        self.assertEqual(zlib.decompress(result, 16 + zlib.MAX_WBITS), body)
+
+        response = self._createCompressingResponse('deflate')
+        response.setHeader('Content-Type', 'text/html')
+        response.setHeader('Vary', 'Cookie')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertEqual(headers['Content-Encoding'], 'deflate')
+        self.assertEqual(headers['Vary'], 'Cookie, Accept-Encoding')
+        self.assertEqual(zlib.decompress(result), body)
+
+    def testCompressIterable(self):
+        import zlib
+        response = self._createCompressingResponse()
+        response.setHeader('Content-Type', 'text/csv')
+        response.setHeader('Content-Length', '4000')
+        response.setResult(DirectResult([b'a' * 2000, b'b' * 2000]))
+        headers, result = self._parseResult(response)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertFalse('Content-Length' in headers)
+        self.assertEqual(zlib.decompress(result, 16 + zlib.MAX_WBITS),
+                         b'a' * 2000 + b'b' * 2000)
+
+    def testCompressSkipped(self):
+        body = b'x' * 2000
+        # Not accepted by the client.
+        response = self._createCompressingResponse(None)
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertFalse('Content-Encoding' in headers)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(result, body)
+        # Too small.
+        response = self._createCompressingResponse()
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(b'x' * 10)
+        headers, result = self._parseResult(response)
+        self.assertFalse('Content-Encoding' in headers)
+        self.assertFalse('Vary' in headers)
+        # Not a compressible content type.
+        response = self._createCompressingResponse()
+        response.setHeader('Content-Type', 'image/png')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertFalse('Content-Encoding' in headers)
+        # Not enabled.
+        response = HTTPRequest(
+            BytesIO(b''), {'HTTP_ACCEPT_ENCODING': 'gzip'}).response
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertFalse('Content-Encoding' in headers)
+
+        # Publications override the default of the response.
+        class CompressingResponse(HTTPResponse):
+            __slots__ = ()
+            compress = True
+
+        class Publication(object):
+            compressResponses = False
+
+        request = HTTPRequest(BytesIO(b''), {'HTTP_ACCEPT_ENCODING': 'gzip'},
+                              response=CompressingResponse())
+        request.setPublication(Publication())
+        response = request.response
+        response.setHeader('Content-Type', 'text/plain')
+        response.setResult(body)
+        headers, result = self._parseResult(response)
+        self.assertFalse('Content-Encoding' in headers)
+
+    def _createETagResponse(self, policy, **env):
+        class Publication(object):
+            etagPolicy = policy
+
+        request = HTTPRequest(BytesIO(b''), env)
+        request.setPublication(Publication())
+        response = request.response
+        response.setHeader('Content-Type', 'text/plain')
+        return response
+
+    def testETag(self):
+        response = self._createETagResponse('strong')
+        response.setResult(b'body')
+        headers, body = self._parseResult(response)
+        etag = headers['Etag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(body, b'body')
+        self.assertEqual(response.getStatus(), 200)
+
+        response = self._createETagResponse('weak')
+        response.setResult(b'body')
+        self.assertEqual(response.getHeader('ETag'), 'W/' + etag)
+
+        response = self._createETagResponse(None)
+        response.setResult(b'body')
+        self.assertEqual(response.getHeader('ETag'), None)
+
+    def testETagNotModified(self):
+        response = self._createETagResponse('strong')
+        response.setResult(b'body')
+        etag = response.getHeader('ETag')
+
+        response = self._createETagResponse(
+            'strong', HTTP_IF_NONE_MATCH='"other", ' + etag)
+        response.setResult(b'body')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(headers['Etag'], etag)
+        self.assertFalse('Content-Length' in headers)
+
+        # Only for GET and HEAD requests.
+        response = self._createETagResponse(
+            'strong', HTTP_IF_NONE_MATCH=etag, REQUEST_METHOD='POST')
+        response.setResult(b'body')
+        self.assertEqual(response.getStatus(), 200)
+        self.assertEqual(response.getHeader('ETag'), None)
+
+    def _getRangeResponse(self, **env):
+        from zope.publisher.http import StreamResult
+        request = HTTPRequest(BytesIO(b''), env)
+        response = request.response
+        response.setHeader('Content-Type', 'application/pdf')
+        response.setHeader('ETag', '"v1"')
+        response.setResult(StreamResult(BytesIO(b'0123456789')))
+        return response
+
+    def testRangeCompressed(self):
+        # Ranges are not served for compressed bodies, they would be
+        # ranges of the uncompressed body.
+        import zlib
+
+        from zope.publisher.http import StreamResult
+
+        class Publication(object):
+            compressResponses = True
+
+        def getResponse(**env):
+            request = HTTPRequest(BytesIO(b''), env)
+            request.setPublication(Publication())
+            response = request.response
+            response.setHeader('Content-Type', 'text/csv')
+            response.setResult(StreamResult(BytesIO(b'x,y\n' * 1000)))
+            return response
+
+        response = getResponse(HTTP_RANGE='bytes=100-',
+                               HTTP_ACCEPT_ENCODING='gzip')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Accept-Ranges', headers)
+        self.assertEqual(zlib.decompress(body, 16 + zlib.MAX_WBITS),
+                         b'x,y\n' * 1000)
+
+        # Without compression, the range is served.
+        response = getResponse(HTTP_RANGE='bytes=100-')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 206)
+        self.assertEqual(headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(len(body), 3900)
+
+        # Small streams are not compressed.
+        request = HTTPRequest(BytesIO(b''), {'HTTP_ACCEPT_ENCODING': 'gzip'})
+        request.setPublication(Publication())
+        response = request.response
+        response.setHeader('Content-Type', 'text/csv')
+        response.setResult(StreamResult(BytesIO(b'x,y\n')))
+        headers, body = self._parseResult(response)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['Accept-Ranges'], 'bytes')
+
+    def testRangeNone(self):
+        response = self._getRangeResponse()
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 200)
+        self.assertEqual(headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(headers['Content-Length'], '10')
+        self.assertEqual(body, b'0123456789')
+
+    def testRangeSingle(self):
+        response = self._getRangeResponse(HTTP_RANGE='bytes=2-4')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 206)
+        self.assertEqual(headers['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(headers['Content-Length'], '3')
+        self.assertEqual(body, b'234')
+
+        response = self._getRangeResponse(HTTP_RANGE='bytes=-3')
+        self.assertEqual(response.consumeBody(), b'789')
+
+    def testRangeMultiple(self):
+        response = self._getRangeResponse(HTTP_RANGE='bytes=0-1,8-')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 206)
+        content_type = headers['Content-Type']
+        self.assertTrue(content_type.startswith(
+            'multipart/byteranges; boundary='))
+        boundary = content_type.split('=')[1]
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertEqual(
+            body.decode('latin-1'),
+            '\r\n--%(b)s\r\n'
+            'Content-Type: application/pdf\r\n'
+            'Content-Range: bytes 0-1/10\r\n\r\n01'
+            '\r\n--%(b)s\r\n'
+            'Content-Type: application/pdf\r\n'
+            'Content-Range: bytes 8-9/10\r\n\r\n89'
+            '\r\n--%(b)s--\r\n' % {'b': boundary})
+
+    def testRangeIfRange(self):
+        response = self._getRangeResponse(
+            HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"v1"')
+        self.assertEqual(response.getStatus(), 206)
+        response = self._getRangeResponse(
+            HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"v0"')
+        self.assertEqual(response.getStatus(), 200)
+        self.assertEqual(response.consumeBody(), b'0123456789')
+
+    def testRangeNotSatisfiable(self):
+        response = self._getRangeResponse(HTTP_RANGE='bytes=20-')
+        headers, body = self._parseResult(response)
+        self.assertEqual(response.getStatus(), 416)
+        self.assertEqual(headers['Content-Range'], 'bytes */10')
+        self.assertEqual(body, b'')
+
     def testWrite_noContentLength(self):
         response = self._createResponse()
         # We have to set all the headers ourself, we choose not to provide a
@@ -1019,6 +1554,21 @@ class TestHTTPResponse(unittest.TestCase):
              b"</body></html>\n"]
         )
 
+    def test_handleException_status(self):
+        from zope.publisher.interfaces import Redirect
+
+        class NotFound(Exception):
+            pass
+
+        for i in range(2):
+            response = HTTPResponse()
+            response.handleException((NotFound, NotFound(), None))
+            self.assertEqual(response.getStatus(), 404)
+            response = HTTPRequest(BytesIO(b''), {}).response
+            response.handleException(
+                (Redirect, Redirect('http://example.com', True), None))
+            self.assertEqual(response.getStatus(), 302)
+
 
 class APITests(BaseTestIPublicationRequest,
                BaseTestIApplicationRequest,
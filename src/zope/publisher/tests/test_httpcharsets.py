@@ -14,8 +14,25 @@
 """Retrieval of HTTP character set information.
 """
 import unittest
+from io import BytesIO
 
+from zope.component import provideAdapter
+from zope.component.testing import tearDown
+from zope.i18n.interfaces import IUserPreferredCharsets
+
+from zope.publisher.http import HTTP_CHARSETS_KEY
 from zope.publisher.http import HTTPCharsets
+from zope.publisher.http import HTTPRequest
+from zope.publisher.http import getCharsetUsingRequest
+from zope.publisher.http import getPreferredCharsetsUsingRequest
+from zope.publisher.interfaces.http import IHTTPRequest
+
+
+class AnnotatedRequest(dict):
+
+    def __init__(self, charsets):
+        self.annotations = {}
+        self['HTTP_ACCEPT_CHARSET'] = charsets
 
 
 class HTTPCharsetTest(unittest.TestCase):
@@ -92,7 +109,67 @@ class HTTPCharsetTest(unittest.TestCase):
         self.assertEqual(list(browser_charsets.getPreferredCharsets()),
                          ['utf-8', 'iso-8859-1'])
 
+    def testCachedPerRequest(self):
+        request = AnnotatedRequest('ISO-8859-1, UTF-16;q=0.33')
+        browser_charsets = HTTPCharsets(request)
+        charsets = browser_charsets.getPreferredCharsets()
+        self.assertEqual(list(charsets), ['iso-8859-1', 'utf-16'])
+        self.assertIs(request.annotations[HTTP_CHARSETS_KEY], charsets)
+        request['HTTP_ACCEPT_CHARSET'] = 'utf-8'
+        self.assertIs(browser_charsets.getPreferredCharsets(), charsets)
+
+    def testCachedAcrossRequests(self):
+        header = 'ISO-8859-1, UTF-8;q=0.66, UTF-16;q=0.33'
+        first = HTTPCharsets(AnnotatedRequest(header))
+        second = HTTPCharsets(AnnotatedRequest(header))
+        self.assertIs(first.getPreferredCharsets(),
+                      second.getPreferredCharsets())
+        self.assertIsInstance(first.getPreferredCharsets(), tuple)
+
+
+class PreferredCharsetsUsingRequestTest(unittest.TestCase):
+
+    def tearDown(self):
+        tearDown()
+
+    def _createRequest(self):
+        return HTTPRequest(
+            BytesIO(b''), {'HTTP_ACCEPT_CHARSET': 'ISO-8859-1, UTF-16;q=0.5'})
+
+    def testNoAdapter(self):
+        request = self._createRequest()
+        self.assertIsNone(getPreferredCharsetsUsingRequest(request))
+        self.assertIsNone(getCharsetUsingRequest(request))
+        # Registering an adapter later is still honored.
+        provideAdapter(HTTPCharsets)
+        self.assertEqual(getCharsetUsingRequest(request), 'iso-8859-1')
+
+    def testAdapterLookedUpOnce(self):
+        calls = []
+
+        class CountingCharsets(HTTPCharsets):
+
+            def getPreferredCharsets(self):
+                calls.append(self)
+                return super(CountingCharsets, self).getPreferredCharsets()
+
+        provideAdapter(CountingCharsets, [IHTTPRequest],
+                       IUserPreferredCharsets)
+        request = self._createRequest()
+        self.assertEqual(getCharsetUsingRequest(request), 'iso-8859-1')
+        self.assertEqual(list(getPreferredCharsetsUsingRequest(request)),
+                         ['iso-8859-1', 'utf-16'])
+        self.assertEqual(len(calls), 1)
+
+        # A retried request resolves the charsets again.
+        retried = request.retry()
+        getCharsetUsingRequest(retried)
+        self.assertEqual(len(calls), 2)
+
 
 def test_suite():
     loader = unittest.TestLoader()
-    return loader.loadTestsFromTestCase(HTTPCharsetTest)
+    return unittest.TestSuite((
+        loader.loadTestsFromTestCase(HTTPCharsetTest),
+        loader.loadTestsFromTestCase(PreferredCharsetsUsingRequestTest),
+    ))
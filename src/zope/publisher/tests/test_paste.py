@@ -12,6 +12,8 @@
 #
 ##############################################################################
 import doctest
+import io
+import tempfile
 import unittest
 
 
@@ -56,8 +58,88 @@ class SamplePublication(object):
         return self, ()
 
 
+class FilePublication(SamplePublication):
+
+    def __init__(self, body):
+        self.body = body
+
+    def callObject(self, request, ob):
+        return self.body
+
+
+class FileWrapper(object):
+
+    def __init__(self, filelike, blksize):
+        self.filelike = filelike
+        self.blksize = blksize
+
+
+class FileWrapperTests(unittest.TestCase):
+
+    def _call(self, body, **environ):
+        from zope.publisher.paste import Application
+        app = Application.__new__(Application)
+        app.publication = FilePublication(body)
+        environ.update({'REQUEST_METHOD': 'GET',
+                        'wsgi.input': io.BytesIO(b'')})
+        return app(environ, lambda status, headers: None)
+
+    def _file(self, data=b'0123456789'):
+        f = tempfile.TemporaryFile()
+        self.addCleanup(f.close)
+        f.write(data)
+        return f
+
+    def test_file(self):
+        from zope.publisher.http import StreamResult
+        f = self._file()
+        result = self._call(StreamResult(f), **{'wsgi.file_wrapper':
+                                                FileWrapper})
+        self.assertIsInstance(result, FileWrapper)
+        self.assertIs(result.filelike, f)
+        self.assertEqual(result.blksize, StreamResult.chunk_size)
+        self.assertEqual(f.tell(), 0)
+
+    def test_no_file_wrapper(self):
+        from zope.publisher.http import StreamResult
+        result = self._call(StreamResult(self._file()))
+        self.assertIsInstance(result, StreamResult)
+        self.assertEqual(b''.join(result), b'0123456789')
+
+    def test_not_a_file(self):
+        from zope.publisher.http import StreamResult
+        environ = {'wsgi.file_wrapper': FileWrapper}
+        result = self._call(StreamResult(io.BytesIO(b'abc')), **environ)
+        self.assertIsInstance(result, StreamResult)
+        result = self._call(u'abc', **environ)
+        self.assertEqual(list(result), [b'abc'])
+
+    def test_spooled_file(self):
+        from zope.publisher.http import StreamResult
+        environ = {'wsgi.file_wrapper': FileWrapper}
+        spooled = tempfile.SpooledTemporaryFile(max_size=100)
+        spooled.write(b'abc')
+        result = self._call(StreamResult(spooled), **environ)
+        self.assertIsInstance(result, StreamResult)
+        # Spooled files are never passed to the file wrapper, even once
+        # they have been written to disk.
+        spooled.rollover()
+        result = self._call(StreamResult(spooled), **environ)
+        self.assertIsInstance(result, StreamResult)
+        self.assertEqual(b''.join(result), b'abc')
+        spooled.close()
+
+    def test_range(self):
+        from zope.publisher.http import StreamResult
+        result = self._call(StreamResult(self._file()), HTTP_RANGE='bytes=2-4',
+                            **{'wsgi.file_wrapper': FileWrapper})
+        self.assertIsInstance(result, StreamResult)
+        self.assertEqual(b''.join(result), b'234')
+
+
 def test_suite():
     return unittest.TestSuite((
+        unittest.makeSuite(FileWrapperTests),
         doctest.DocFileSuite(
             '../paste.txt',
             optionflags=doctest.ELLIPSIS | doctest.NORMALIZE_WHITESPACE,
@@ -14,6 +14,7 @@
 """Test Publisher
 """
 import unittest
+from doctest import DocTestSuite
 from io import BytesIO
 
 from zope.interface import implementedBy
@@ -143,6 +144,12 @@ class PublisherTests(unittest.TestCase):
         self._unregisterExcAdapter(doReRaiseAdapter)
         self.assertEqual(raised, True)
 
+    def testIReRaiseExceptionAdapterUnregistered(self):
+        self._registerExcAdapter(DoNotReRaiseException)
+        self._publisherResults('/_item')
+        self._unregisterExcAdapter(DoNotReRaiseException)
+        self.assertRaises(Unauthorized, self._publisherResults, '/_item')
+
     def testRetryErrorIsUnwrapped(self):
         test = self
 
@@ -176,4 +183,7 @@ class PublisherTests(unittest.TestCase):
 
 def test_suite():
     loader = unittest.TestLoader()
-    return loader.loadTestsFromTestCase(PublisherTests)
+    return unittest.TestSuite((
+        loader.loadTestsFromTestCase(PublisherTests),
+        DocTestSuite('zope.publisher.publish'),
+    ))
@@ -0,0 +1,222 @@
+##############################################################################
+#
+# Copyright (c) 2022 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Tests for the traversal cache
+"""
+import unittest
+from doctest import DocTestSuite
+from io import BytesIO
+
+from zope.interface import Interface
+from zope.interface import directlyProvides
+from zope.interface.verify import verifyObject
+
+from zope.publisher.base import BaseRequest
+from zope.publisher.interfaces import ITraversalCache
+from zope.publisher.interfaces import ITraversalTracer
+from zope.publisher.interfaces import NotFound
+from zope.publisher.tests.publication import TestPublication
+from zope.publisher.traversal import TraversalCache
+from zope.publisher.traversal import TraversalTracer
+
+
+class ISkin(Interface):
+    pass
+
+
+class Container(object):
+
+    def __init__(self, name, **children):
+        self.name = name
+        self.__dict__.update(children)
+
+
+class CountingPublication(TestPublication):
+
+    def __init__(self, traversalCache):
+        self.traversalCache = traversalCache
+        self.traversed = []
+        self.hooks = 0
+
+    def traverseName(self, request, ob, name, check_auth=1):
+        self.traversed.append(name)
+        if name.startswith('missing') or not hasattr(ob, name):
+            raise NotFound(ob, name, request)
+        return TestPublication.traverseName(self, request, ob, name)
+
+    def callTraversalHooks(self, request, ob):
+        self.hooks += 1
+
+
+def getKey(request, ob):
+    return ob.name
+
+
+class TraversalCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Container(
+            'app', folder=Container('folder', item=Container('item')))
+        self.cache = TraversalCache(maxsize=10, getKey=getKey)
+        self.publication = CountingPublication(self.cache)
+
+    def _traverse(self, *names):
+        request = BaseRequest(BytesIO(), {})
+        request.setPublication(self.publication)
+        request.setTraversalStack(list(reversed(names)))
+        return request, request.traverse(self.app)
+
+    def test_interface(self):
+        verifyObject(ITraversalCache, self.cache)
+
+    def test_cached(self):
+        request, ob = self._traverse('folder', 'item')
+        self.assertTrue(ob is self.app.folder.item)
+        self.assertEqual(self.publication.traversed, ['folder', 'item'])
+        request, ob = self._traverse('folder', 'item')
+        self.assertTrue(ob is self.app.folder.item)
+        self.assertEqual(self.publication.traversed, ['folder', 'item'])
+        # Traversal hooks and traversed names are still recorded.
+        self.assertEqual(self.publication.hooks, 6)
+        self.assertEqual(request._traversed_names, ['folder', 'item'])
+
+    def test_no_key(self):
+        self.cache = TraversalCache()
+        self.publication = CountingPublication(self.cache)
+        self._traverse('folder')
+        self._traverse('folder')
+        self.assertEqual(self.publication.traversed, ['folder', 'folder'])
+
+    def test_invalidate(self):
+        self._traverse('folder', 'item')
+        self.cache.invalidate('folder')
+        self._traverse('folder', 'item')
+        self.assertEqual(self.publication.traversed,
+                         ['folder', 'item', 'item'])
+        self.cache.clear()
+        self._traverse('folder')
+        self.assertEqual(self.publication.traversed,
+                         ['folder', 'item', 'item', 'folder'])
+
+    def test_layers(self):
+        self._traverse('folder')
+        request = BaseRequest(BytesIO(), {})
+        directlyProvides(request, ISkin)
+        request.setPublication(self.publication)
+        request.setTraversalStack(['folder'])
+        request.traverse(self.app)
+        self.assertEqual(self.publication.traversed, ['folder', 'folder'])
+
+    def test_maxsize(self):
+        self.cache = TraversalCache(maxsize=1, getKey=getKey)
+        self.publication = CountingPublication(self.cache)
+        self._traverse('folder', 'item')
+        self.assertEqual(len(self.cache._cache), 1)
+        # Only the item in the folder is still cached.
+        self._traverse('folder')
+        self.assertEqual(self.publication.traversed,
+                         ['folder', 'item', 'folder'])
+
+    def test_maxsize_children(self):
+        # The size bound applies to the children of a single parent, too.
+        self.app = Container(
+            'app', **{'item%d' % i: Container('item%d' % i)
+                      for i in range(100)})
+        for i in range(100):
+            self._traverse('item%d' % i)
+        self.assertEqual(len(self.cache._cache), 10)
+        self._traverse('item99')
+        self.assertEqual(len(self.publication.traversed), 100)
+
+    def test_invalidate_many(self):
+        # Invalidating many keys doesn't let the cache grow without bound.
+        self._traverse('folder')
+        for i in range(100):
+            self.cache.invalidate('key%d' % i)
+        self.assertTrue(len(self.cache._generations) <= 10)
+        self._traverse('folder')
+        self.assertEqual(self.publication.traversed, ['folder', 'folder'])
+
+    def test_notfound(self):
+        now = [1000.0]
+        self.cache._time = lambda: now[0]
+        self.assertRaises(NotFound, self._traverse, 'folder', 'missing')
+        self.assertRaises(NotFound, self._traverse, 'folder', 'missing')
+        self.assertEqual(self.publication.traversed, ['folder', 'missing'])
+        # The entry expires after the TTL.
+        now[0] += 61
+        self.assertRaises(NotFound, self._traverse, 'folder', 'missing')
+        self.assertEqual(self.publication.traversed,
+                         ['folder', 'missing', 'missing'])
+        # And is dropped on invalidation.
+        self.cache.invalidate('folder')
+        self.assertRaises(NotFound, self._traverse, 'folder', 'missing')
+        self.assertEqual(self.publication.traversed,
+                         ['folder', 'missing', 'missing', 'missing'])
+
+    def test_notfound_maxsize(self):
+        # A scan for many missing names under one parent is bounded.
+        for i in range(100):
+            self.assertRaises(NotFound, self._traverse, 'missing%d' % i)
+        self.assertEqual(len(self.cache._notFound), 10)
+
+    def test_notfound_expired(self):
+        # Expired entries are dropped when read.
+        now = [1000.0]
+        self.cache._time = lambda: now[0]
+        self.assertRaises(NotFound, self._traverse, 'folder', 'gone')
+        self.assertEqual(len(self.cache._notFound), 1)
+        now[0] += 61
+        self.app.folder.gone = Container('gone')
+        self._traverse('folder', 'gone')
+        self.assertEqual(len(self.cache._notFound), 0)
+
+    def test_notfound_disabled(self):
+        self.cache = TraversalCache(getKey=getKey, notFoundTTL=0)
+        self.publication = CountingPublication(self.cache)
+        self.assertRaises(NotFound, self._traverse, 'missing')
+        self.assertRaises(NotFound, self._traverse, 'missing')
+        self.assertEqual(self.publication.traversed, ['missing', 'missing'])
+
+
+class TraversalTracerTests(unittest.TestCase):
+
+    def test_interface(self):
+        verifyObject(ITraversalTracer, TraversalTracer())
+
+    def test_traverse(self):
+        app = Container('app', folder=Container('folder'))
+        publication = TestPublication()
+        publication.traversalTracer = tracer = TraversalTracer()
+        request = BaseRequest(BytesIO(), {})
+        request.setPublication(publication)
+        request.setTraversalStack(['folder'])
+        request.traverse(app)
+        stats = tracer.getStatistics()
+        self.assertEqual(list(stats), [__name__ + '.Container'])
+        self.assertEqual(stats[__name__ + '.Container']['steps'], 1)
+        self.assertEqual(stats[__name__ + '.Container']['defaults'], 0)
+        # The statistics are a copy.
+        stats[__name__ + '.Container']['steps'] = 42
+        self.assertEqual(
+            tracer.getStatistics()[__name__ + '.Container']['steps'], 1)
+        tracer.clear()
+        self.assertEqual(tracer.getStatistics(), {})
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(TraversalCacheTests),
+        unittest.makeSuite(TraversalTracerTests),
+        DocTestSuite('zope.publisher.traversal'),
+    ))
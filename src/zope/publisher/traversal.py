@@ -0,0 +1,225 @@
+##############################################################################
+#
+# Copyright (c) 2022 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Optional traversal helpers for publications
+"""
+import itertools
+import threading
+import time
+from bisect import bisect_left
+
+from zope.interface import implementer
+from zope.interface import providedBy
+from zope.security.proxy import removeSecurityProxy
+
+from zope.publisher._cache import LRUCache
+from zope.publisher.interfaces import ITraversalCache
+from zope.publisher.interfaces import ITraversalTracer
+from zope.publisher.interfaces import NotFound
+
+
+@implementer(ITraversalCache)
+class TraversalCache(object):
+    """Cache of traversal results for large, read-mostly object trees.
+
+    Results are cached per (parent key, name, request layers), where the
+    request layers are the interfaces provided by the request, and at most
+    ``maxsize`` of them are kept.  Only children of objects for which
+    `getKey` returns a key are cached; pass a ``getKey(request, ob)``
+    function or override the method to enable caching.
+
+    Cached objects are shared between requests and threads, so they must
+    not depend on the principal or any other per-request state.
+
+    A cache hit skips ``publication.traverseName`` entirely, including any
+    security checks it does: a child cached for one principal is returned
+    to every other principal reaching the same parent.  Only cache
+    children that every principal may traverse to, or include the
+    principal (e.g. ``request.principal.id``) in the key returned by
+    `getKey`.
+
+      >>> class Publication(object):
+      ...     def traverseName(self, request, ob, name):
+      ...         print('traversing %s' % name)
+      ...         return ob[name]
+
+      >>> tree = {'folder': {'item': 'Item'}}
+      >>> cache = TraversalCache(maxsize=10,
+      ...                        getKey=lambda request, ob: id(ob))
+      >>> cache.traverseName(Publication(), object(), tree, 'folder')
+      traversing folder
+      {'item': 'Item'}
+      >>> cache.traverseName(Publication(), object(), tree, 'folder')
+      {'item': 'Item'}
+
+      >>> cache.invalidate(id(tree))
+      >>> cache.traverseName(Publication(), object(), tree, 'folder')
+      traversing folder
+      {'item': 'Item'}
+
+    Names that raise `NotFound` are remembered for ``notFoundTTL``
+    seconds, so that repeated requests for missing objects (e.g. by
+    scanners) fail without traversing again:
+
+      >>> class Missing(Publication):
+      ...     def traverseName(self, request, ob, name):
+      ...         print('traversing %s' % name)
+      ...         raise NotFound(ob, name, request)
+
+      >>> for i in range(2):
+      ...     try:
+      ...         cache.traverseName(Missing(), object(), tree, 'wp-admin')
+      ...     except NotFound:
+      ...         print('not found')
+      traversing wp-admin
+      not found
+      not found
+    """
+
+    _time = staticmethod(time.time)
+
+    def __init__(self, maxsize=1000, getKey=None, notFoundTTL=60):
+        self.maxsize = maxsize
+        self._cache = LRUCache(maxsize)
+        self._notFound = LRUCache(maxsize if notFoundTTL > 0 else 0)
+        self.notFoundTTL = notFoundTTL
+        if getKey is not None:
+            self.getKey = getKey
+        # Entries are only valid for the current generation of their parent
+        # key.  Generations are unique, so that entries of an invalidated
+        # key never become valid again.
+        self._counter = itertools.count(1)
+        self._generations = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def getKey(self, request, ob):
+        """See ITraversalCache"""
+        return None
+
+    def traverseName(self, publication, request, ob, name):
+        """See ITraversalCache"""
+        key = self.getKey(request, ob)
+        if key is None:
+            return publication.traverseName(request, ob, name)
+
+        entry = (key, name, providedBy(request))
+        generation = self._generations.get(key, self._generation)
+        cached = self._cache.get(entry)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        missing = self._notFound.get(entry)
+        if missing is not None:
+            if missing[0] == generation and missing[1] > self._time():
+                raise NotFound(ob, name, request)
+            # Expired or invalidated.
+            self._notFound.pop(entry)
+
+        try:
+            child = publication.traverseName(request, ob, name)
+        except NotFound:
+            if self.notFoundTTL > 0:
+                self._notFound.set(
+                    entry, (generation, self._time() + self.notFoundTTL))
+            raise
+
+        self._cache.set(entry, (generation, child))
+        return child
+
+    def invalidate(self, key):
+        """See ITraversalCache"""
+        with self._lock:
+            generations = self._generations
+            if len(generations) >= self.maxsize:
+                # Rather than keeping the generations of ever more keys,
+                # start over.
+                self._clear()
+            generations[key] = next(self._counter)
+
+    def clear(self):
+        """See ITraversalCache"""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        # Entries being added by other threads belong to an older
+        # generation and are never used.
+        self._generation = next(self._counter)
+        self._generations.clear()
+        self._cache.clear()
+        self._notFound.clear()
+
+
+@implementer(ITraversalTracer)
+class TraversalTracer(object):
+    """Aggregates traversal step timings into per-class histograms.
+
+      >>> class Folder(object):
+      ...     pass
+
+      >>> tracer = TraversalTracer(buckets=(0.001, 0.1))
+      >>> tracer.record(None, Folder(), 'item', 0.0005, 0.2, False)
+      >>> tracer.record(None, Folder(), 'index.html', 0.05, 0.0, True)
+      >>> stats = tracer.getStatistics()['zope.publisher.traversal.Folder']
+      >>> stats['steps'], stats['defaults']
+      (2, 1)
+
+    The last bucket counts all times above the last bound:
+
+      >>> stats['traverseName']
+      [1, 1, 0]
+      >>> stats['callTraversalHooks']
+      [1, 0, 1]
+    """
+
+    buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+    def __init__(self, buckets=None):
+        if buckets is not None:
+            self.buckets = tuple(buckets)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, request, ob, name, traverseTime, hooksTime, default):
+        """See ITraversalTracer"""
+        cls = type(removeSecurityProxy(ob))
+        key = '%s.%s' % (cls.__module__, cls.__name__)
+        buckets = self.buckets
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    'steps': 0,
+                    'defaults': 0,
+                    'traverseName': [0] * (len(buckets) + 1),
+                    'callTraversalHooks': [0] * (len(buckets) + 1),
+                }
+            stats['steps'] += 1
+            if default:
+                stats['defaults'] += 1
+            stats['traverseName'][bisect_left(buckets, traverseTime)] += 1
+            stats['callTraversalHooks'][bisect_left(buckets, hooksTime)] += 1
+
+    def getStatistics(self):
+        """See ITraversalTracer"""
+        with self._lock:
+            return {key: {name: (list(value) if isinstance(value, list)
+                                 else value)
+                          for name, value in stats.items()}
+                    for key, stats in self._stats.items()}
+
+    def clear(self):
+        """See ITraversalTracer"""
+        with self._lock:
+            self._stats.clear()